@@ -0,0 +1,188 @@
+"""
+Admission control for chat streams with global and per-organization concurrency
+limits and a fair, round-robin queue across organizations. Lower priority values
+(interactive runs) are admitted before higher ones (scheduled runs), which wait
+without a timeout.
+"""
+
+import asyncio
+import itertools
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator
+
+from app.config import settings
+from app.metrics import admission_queued, admission_rejections, admission_wait_seconds
+
+
+class AdmissionRejected(Exception):
+    """Raised when a stream cannot be queued or waited too long for a slot."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass(eq=False)
+class Ticket:
+    organization_id: int
+    priority: int = 0
+    enqueued_at: float = field(default_factory=time.monotonic)
+    granted: bool = False
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        global_limit: int,
+        org_limit: int,
+        max_queue: int,
+        org_max_queue: int,
+        queue_timeout: float,
+        retry_after: int,
+    ):
+        self.global_limit = global_limit
+        self.org_limit = org_limit
+        self.max_queue = max_queue
+        self.org_max_queue = org_max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.active = 0
+        self.active_by_org: dict[int, int] = {}
+        self.queues: dict[int, deque[Ticket]] = {}  # insertion order is the rotation
+
+    def _queued(self) -> int:
+        return sum(len(q) for q in self.queues.values())
+
+    def _order(self) -> list[Ticket]:
+        """Waiting tickets in the order they would be admitted (by priority, then
+        round-robin by org)"""
+        rounds = itertools.zip_longest(*self.queues.values())
+        order = [ticket for row in rounds for ticket in row if ticket is not None]
+        return sorted(order, key=lambda ticket: ticket.priority)
+
+    def _dispatch(self) -> None:
+        while self.active < self.global_limit:
+            eligible = [
+                (queue[0].priority, rotation, org_id)
+                for rotation, (org_id, queue) in enumerate(self.queues.items())
+                if self.active_by_org.get(org_id, 0) < self.org_limit
+            ]
+            if not eligible:
+                break
+
+            _, _, org_id = min(eligible)
+            queue = self.queues.pop(org_id)
+            ticket = queue.popleft()
+            if queue:
+                self.queues[org_id] = queue  # move the org to the back of the rotation
+            self._grant(ticket)
+
+        admission_queued.set(self._queued())
+        for ticket in self._order():
+            ticket.changed.set()
+
+    def _grant(self, ticket: Ticket) -> None:
+        ticket.granted = True
+        ticket.changed.set()
+        self.active += 1
+        org_id = ticket.organization_id
+        self.active_by_org[org_id] = self.active_by_org.get(org_id, 0) + 1
+        admission_wait_seconds.observe(time.monotonic() - ticket.enqueued_at)
+
+    def _has_slot(self, organization_id: int) -> bool:
+        return (
+            organization_id not in self.queues
+            and self.active < self.global_limit
+            and self.active_by_org.get(organization_id, 0) < self.org_limit
+        )
+
+    def check(self, organization_id: int) -> None:
+        """Raises AdmissionRejected if a new stream for the org could not even be queued"""
+        if self._has_slot(organization_id):
+            return
+        org_queue = self.queues.get(organization_id, ())
+        if self._queued() >= self.max_queue or len(org_queue) >= self.org_max_queue:
+            admission_rejections.labels("queue_full").inc()
+            raise AdmissionRejected("queue_full", self.retry_after)
+
+    def enter(
+        self, organization_id: int, priority: int = 0, force: bool = False
+    ) -> Ticket:
+        """Takes a slot or joins the queue; raises AdmissionRejected if the queue is
+        full, unless `force` is set for work that was already accepted"""
+        ticket = Ticket(organization_id, priority)
+        if self._has_slot(organization_id):
+            self._grant(ticket)
+            return ticket
+
+        if not force:
+            self.check(organization_id)
+        org_queue = self.queues.get(organization_id, deque())
+        # ahead of the org's lower-priority tickets, behind its equal ones
+        position = next(
+            (i for i, queued in enumerate(org_queue) if queued.priority > priority),
+            len(org_queue),
+        )
+        org_queue.insert(position, ticket)
+        self.queues[organization_id] = org_queue
+        admission_queued.set(self._queued())
+        return ticket
+
+    async def wait(self, ticket: Ticket) -> AsyncIterator[int]:
+        """Yields the ticket's queue position whenever it changes until a slot is granted.
+
+        Only priority 0 tickets time out, QUEUE_TIMEOUT seconds after they entered.
+        """
+        deadline = None if ticket.priority else ticket.enqueued_at + self.queue_timeout
+        position = None
+        while not ticket.granted:
+            # cleared before the yield: a grant while the caller is suspended there
+            # sets it again instead of being lost
+            ticket.changed.clear()
+            current = self._order().index(ticket) + 1
+            if current != position:
+                position = current
+                yield position
+                if ticket.granted:
+                    break
+
+            try:
+                await asyncio.wait_for(
+                    ticket.changed.wait(),
+                    timeout=deadline - time.monotonic() if deadline else None,
+                )
+            except asyncio.TimeoutError:
+                if ticket.granted:
+                    break
+                self.leave(ticket)
+                admission_rejections.labels("timeout").inc()
+                raise AdmissionRejected("timeout", self.retry_after)
+
+    def leave(self, ticket: Ticket) -> None:
+        """Releases a granted slot or withdraws a queued ticket"""
+        org_id = ticket.organization_id
+        if ticket.granted:
+            ticket.granted = False
+            self.active -= 1
+            self.active_by_org[org_id] -= 1
+            if not self.active_by_org[org_id]:
+                del self.active_by_org[org_id]
+        elif org_id in self.queues and ticket in self.queues[org_id]:
+            self.queues[org_id].remove(ticket)
+            if not self.queues[org_id]:
+                del self.queues[org_id]
+        self._dispatch()
+
+
+admission = AdmissionController(
+    global_limit=settings.admission_global_limit,
+    org_limit=settings.admission_org_limit,
+    max_queue=settings.admission_max_queue,
+    org_max_queue=settings.admission_org_max_queue,
+    queue_timeout=settings.admission_queue_timeout,
+    retry_after=settings.admission_retry_after,
+)
@@ -1,9 +1,45 @@
 from pydantic import BaseModel
 
 
+class ModelTier(BaseModel):
+    model: str
+    timeout: float  # seconds per LLM call
+    max_retries: int = 2
+    hedge_after: float | None = None  # seconds before a backup call is started
+
+
+class ModelPrice(BaseModel):
+    # USD per million tokens
+    input: float
+    cached_input: float
+    output: float
+
+
+class ContextWindow(BaseModel):
+    max_tokens: int = 16000  # approximate token budget for the message history
+    keep_last_turns: int = 3  # most recent turns always sent verbatim
+    tool_output_chars: int = 400  # older tool outputs are truncated to this length
+    summary_model: str = "routing"
+    summary_prompt: str = """Summarize the earlier part of this conversation between a hotelier and Otelia for use as context in later turns. Keep the user's questions, the hotels, metrics and date ranges involved, key figures and conclusions, and any SQL table names that were used. Drop raw query rows, code and tool output. Be concise."""
+
+
 class AgentConfig(BaseModel):
-    supervisor_model: str = "openai/gpt-4o"
-    supervisor_prompt: str = """Today is {today}. You are Otelia, an AI assistant designed to serve hoteliers and hotel management staff. Your interface is a chat popup on {application} which is an application that {description}. The interface includes a dropdown in the lower left corner to select multiple hotels and a button in the top right corner to create a new thread. You specialize in answering hotel operational questions, such as those related to hotel performance, metrics, trends, and other management insights.
+    model_tiers: dict[str, ModelTier] = {
+        "routing": ModelTier(model="openai/gpt-4o-mini", timeout=30, hedge_after=5),
+        "generation": ModelTier(model="openai/gpt-4o", timeout=90, hedge_after=20),
+    }
+
+    model_prices: dict[str, ModelPrice] = {
+        "openai/gpt-4o-mini": ModelPrice(input=0.15, cached_input=0.075, output=0.6),
+        "openai/gpt-4o": ModelPrice(input=2.5, cached_input=1.25, output=10),
+    }
+
+    context_window: ContextWindow = ContextWindow()
+
+    supervisor_model: str = "routing"
+    supervisor_tools: list[str] = ["hotel_lookup"]
+    hotel_inline_limit: int = 20  # larger selections are sent as IDs only
+    supervisor_prompt: str = """You are Otelia, an AI assistant designed to serve hoteliers and hotel management staff. Your interface is a chat popup on the application described in the session context. The interface includes a dropdown in the lower left corner to select multiple hotels and a button in the top right corner to create a new thread. You specialize in answering hotel operational questions, such as those related to hotel performance, metrics, trends, and other management insights.
 
     You have access to subagents to help fulfill complex queries:
     - SQL Agent: This agent generates SQL queries to retrieve specific information from the hotel database (e.g., user data, performance metrics for selected hotels). It only returns raw SQL code—nothing else. Route to this agent first if the user's question requires pulling data from the database.
@@ -19,27 +55,48 @@ class AgentConfig(BaseModel):
     In your final response:
     - Always answer the user's question clearly and completely.
     - If the Analysis Agent was called, include a summary of its findings in your response.
-    - If a visualization was created by the Analysis Agent, include it in your response using the format: ![Title of Image]({url}/images/temp/filename.png), where "Title of Image" is a descriptive title and "filename.png" is the actual file name provided.
+    - If a visualization was created by the Analysis Agent, include it in your response using the format: ![Title of Image](<interpreter URL>/images/temp/filename.png), where "Title of Image" is a descriptive title, "filename.png" is the actual file name provided and the interpreter URL is given in the session context.
     - If returning raw data, format it as a markdown table for better readability.
 
     Be friendly, cooperative, and professional in all interactions. Use clear language, offer helpful insights, and ensure responses are tailored to hotel management needs, accounting for the selected hotels. Feel free to use markdown formatting for headers, etc
 
     NEVER UNDER ANY CIRCUMSTANCE RETURN SQL TO AN AGENT! IF AN SQL QUERY FAILS BY THE ANALYSIS AGENT, REROUTE TO THE SQL AGENT TO COME UP WITH A REFINED QUERY OR HANDLE THE ERROR GRACEFULLY AND PROVIDE USEFUL FEEDBACK.
 
-    Selected hotels:{hotels}
+    The session context (date, application, interpreter URL and selected hotels) follows in the next message.
+    """
+    # "supervisor" routes every hop through the supervisor; "direct" adds a data agent
+    # that runs the SQL agent and hands its query straight to the analysis agent
+    graph_mode: str = "supervisor"
+    direct_handoff_prompt: str = """
+    Direct handoff:
+    - Data Agent: Runs the SQL Agent and passes its query straight to the Analysis Agent, returning the analysis. For questions that need data retrieved and analyzed, route to the Data Agent instead of the SQL Agent followed by the Analysis Agent.
+    - Use the SQL Agent alone only when the user asks for the SQL itself, and the Analysis Agent alone when no new data retrieval is needed.
+    """
+    supervisor_context: str = """Session context:
+    - Today is {today}.
+    - Application: {application}, an application that {description}.
+    - Interpreter URL: {url}
+    - Selected hotels: {hotels}
     """
 
     # sql Agent config
     sql_agent_route_name: str = "Retrieval Agent"
     sql_agent_route_message: str = "Gathering information"
-    sql_agent_model: str = "openai/gpt-4o"
-    sql_agent_tools: list[str] = ["schema_retriever", "sql_executor"]
-    sql_agent_prompt: str = """Today is {today}. You are a SQL Agent specialized in generating optimized SQL queries for hotel database analysis on a Snowflake database.
+    sql_agent_model: str = "generation"
+    sql_agent_tools: list[str] = [
+        "kpi_sql",
+        "schema_retriever",
+        "sql_executor",
+        "hotel_lookup",
+        "read_tool_result",
+    ]
+    sql_agent_prompt: str = """You are a SQL Agent specialized in generating optimized SQL queries for hotel database analysis on a Snowflake database.
     Your responsibilities:
     - Translate natural language questions into precise, efficient SQL queries for hotel-related data.
     - Use the `schema_retriever` tool to fetch relevant schema details (tables, views, columns).
     - For derived metrics (e.g., ADR = Room Revenue ÷ Room Nights), identify constituent columns (e.g., ROOM_REVENUE, ROOM_NIGHTS) and map them accurately.
     - Apply hotel-specific filters using HOTEL_IDs from the provided list (hotels, a comma-separated list of IDs, e.g., `WHERE HOTEL_ID IN (...)`).
+    - For ADR, occupancy, RevPAR, room revenue or room nights over a date range (in total or by hotel, day, month or market segment), call `kpi_sql` first and return its SQL unchanged; it needs no schema lookup or test run. Build the query yourself only for anything the template does not cover.
     - Always include hotel names in the SELECT clause for clarity by joining with `dm_bi.VW_HOTEL`. Map HOTEL_ID from the main table to the ID column in `dm_bi.VW_HOTEL` to retrieve the Name column.
     - Use the `sql_executor` tool to validate queries. For SELECT queries, apply a LIMIT 100 clause during testing unless aggregation (e.g., SUM, COUNT) is used; remove the LIMIT in the final output.
     - Include concise comments in the SQL to explain key steps (e.g., table selection, joins, filters, metric calculations).
@@ -53,7 +110,7 @@ class AgentConfig(BaseModel):
 
     Date handling:
     - BUSINESS_DATE columns are in YYYYMMDD format (e.g., 20250815 for August 15, 2025).
-    - For date range queries (e.g., "next three months"), calculate dates from {today} (e.g., for August 20, 2025, use `BETWEEN 20250820 AND 20251119`).
+    - For date range queries (e.g., "next three months"), calculate dates from today's date in the session context (e.g., for August 20, 2025, use `BETWEEN 20250820 AND 20251119`).
     - Use BETWEEN for date ranges: `WHERE BUSINESS_DATE BETWEEN YYYYMMDD AND YYYYMMDD`.
 
     Error handling:
@@ -75,14 +132,28 @@ class AgentConfig(BaseModel):
     ```
 
     Do not interpret or include `sql_executor` results. Return only the SQL code block unless explicitly instructed otherwise.
-    Selected Hotels: {hotels}
+
+    The session context (date and selected hotels) follows in the next message.
+    """
+    prefetched_schema: str = """Schema excerpts retrieved for the user's latest question. Call `schema_retriever` only if they do not cover what the query needs.
+
+    {schema}
+    """
+    sql_agent_context: str = """Session context:
+    - Today is {today}.
+    - Selected Hotels: {hotels}
     """
 
     # Analysis Agent config
     analysis_agent_route_name: str = "Analysis Agent"
     analysis_agent_route_message: str = "Performing calculations"
-    analysis_agent_model: str = "openai/gpt-4o"
-    analysis_agent_tools: list[str] = ["code_interpreter", "web_search"]
+    analysis_agent_model: str = "generation"
+    analysis_agent_tools: list[str] = [
+        "code_interpreter",
+        "web_search",
+        "hotel_lookup",
+        "read_tool_result",
+    ]
     analysis_agent_prompt: str = """You are an Analysis Agent developed by Otelier, a provider of hotel management software. You operate within Otelier’s Intellisight product, which delivers hotel performance data (e.g., bookings, revenue, ADR, occupancy) through PowerBI dashboards. Your role is to interpret hotel-related datasets, perform data science, calculations, and research, and produce insights for hotel management staff. As a subagent in a multi-agent system, you are coordinated by Otelia and do not provide final outputs directly to users.
 
     Responsibilities:
@@ -107,15 +178,27 @@ class AgentConfig(BaseModel):
     Output format:
       - Provide a natural language summary of findings.
       - When useful, include a Markdown table for key metrics (e.g., | Date | ADR ($) |).
-      - Always use human-readable hotel names instead of HOTEL_IDs.
-      - For visualizations, describe the chart (e.g., “A bar chart showing revenue by hotel”) and include the image URL from the `images` field (e.g., {url}/images/temp/<uuid>.png)
+      - Always use human-readable hotel names instead of HOTEL_IDs. Resolve names with the hotel_lookup tool when the results only carry IDs.
+      - For visualizations, describe the chart (e.g., “A bar chart showing revenue by hotel”) and include the image URL from the `images` field prefixed with the interpreter URL from the session context (e.g., <interpreter URL>/images/temp/<uuid>.png)
       - For datasets, do not inline entire tables. Provide small Markdown tables only for key metrics. For full results, reference the CSV link from the files list. Example: 
-        “Detailed daily revenue is available in this CSV: {url}/files/temp/<uuid>.csv”
+        “Detailed daily revenue is available in this CSV: <interpreter URL>/files/temp/<uuid>.csv”
 
     Never fabricate data—use only database results or trusted sources.
     """
+    analysis_agent_context: str = """Session context:
+    - Today is {today}.
+    - Interpreter URL: {url}
+    """
+
+    # Data Agent config (graph_mode "direct")
+    data_agent_route_name: str = "Data Agent"
+    data_agent_route_message: str = "Gathering and analyzing data"
 
     route_config: dict[str, dict[str, str]] = {
+        "transfer_to_data_agent": {
+            "name": data_agent_route_name,
+            "message": data_agent_route_message,
+        },
         "transfer_to_sql_agent": {
             "name": sql_agent_route_name,
             "message": sql_agent_route_message,
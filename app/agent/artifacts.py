@@ -0,0 +1,92 @@
+"""
+Out-of-line storage of large tool results.
+
+Tool outputs above TOOL_RESULT_INLINE_CHARS are written to the artifact store,
+and the tool returns a compact reference with a summary instead: row count,
+columns and the first rows for SQL results, or the interpreter response with
+its printed output truncated and object previews reduced to their shape. The
+checkpointed ToolMessage then holds only that, and `read_tool_result` pages
+through the full payload when an agent of the same thread needs it.
+"""
+
+import json
+from typing import Any
+
+from app.config import settings
+from app.database.artifact_store import artifact_store
+from app.metrics import tool_results
+
+REFERENCE = "artifact:"
+PREVIEW_ROWS = 5
+OUTPUT_CHARS = 1500
+
+
+def _summarize_rows(rows: list[dict[str, Any]]) -> dict[str, Any]:
+    return {
+        "rows": len(rows),
+        "columns": list(rows[0]) if rows else [],
+        "first_rows": rows[:PREVIEW_ROWS],
+    }
+
+
+def _summarize_object(value: Any) -> Any:
+    if isinstance(value, dict) and value.get("type") in ("DataFrame", "Array"):
+        return {key: value[key] for key in value if key != "data"}
+    text = json.dumps(value, default=str)
+    return value if len(text) <= 200 else f"{text[:200]}…"
+
+
+def _summarize_interpreter(response: dict[str, Any]) -> dict[str, Any]:
+    summary = {
+        key: value
+        for key, value in response.items()
+        if key not in ("output", "errors", "objects")
+    }
+    for key in ("output", "errors"):
+        text = response.get(key) or ""
+        summary[key] = text if len(text) <= OUTPUT_CHARS else f"{text[:OUTPUT_CHARS]}…"
+    summary["objects"] = {
+        name: _summarize_object(value)
+        for name, value in (response.get("objects") or {}).items()
+    }
+    return summary
+
+
+def offload(tool: str, result: Any, thread_id: str) -> Any:
+    """Returns `result` unchanged when small, otherwise a reference and summary
+    readable from the thread"""
+    if settings.tool_result_inline_chars <= 0:
+        return result
+    content = result if isinstance(result, str) else json.dumps(result, default=str)
+    if len(content) <= settings.tool_result_inline_chars:
+        tool_results.labels(tool, "inline").inc()
+        return result
+
+    digest = artifact_store.put(content, thread_id)
+    tool_results.labels(tool, "offloaded").inc()
+    if isinstance(result, list) and all(isinstance(row, dict) for row in result):
+        summary: Any = _summarize_rows(result)
+    elif isinstance(result, dict):
+        summary = _summarize_interpreter(result)
+    else:
+        summary = content[: settings.tool_result_inline_chars // 2]
+    return {
+        "stored_as": f"{REFERENCE}{digest}",
+        "chars": len(content),
+        "summary": summary,
+        "note": "Full result stored out of line; call read_tool_result with "
+        "`stored_as` if you need more than the summary.",
+    }
+
+
+def dereference(reference: str, thread_id: str, offset: int = 0) -> str:
+    """A page of a result the thread stored, at most TOOL_RESULT_INLINE_CHARS long"""
+    content = artifact_store.get(reference.removeprefix(REFERENCE), thread_id)
+    if content is None:
+        return f"No stored result {reference}; it may have expired."
+    limit = settings.tool_result_inline_chars
+    page = content[offset : offset + limit]
+    end = offset + len(page)
+    if end < len(content):
+        page += f"\n[chars {offset}-{end} of {len(content)}; next offset {end}]"
+    return page
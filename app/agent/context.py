@@ -0,0 +1,128 @@
+"""
+Module for keeping the message history sent to the agents within a token budget.
+"""
+
+from typing import NotRequired, TypedDict
+
+from langchain_core.messages import (
+    AnyMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+    get_buffer_string,
+)
+from langchain_core.messages.utils import count_tokens_approximately
+from langgraph.prebuilt.chat_agent_executor import AgentState
+
+from app.agent.agent_config import agent_config
+from app.agent.models import load_agent_model
+
+
+class ContextSummary(TypedDict):
+    through_id: str  # id of the last message folded into the summary
+    text: str
+
+
+class ContextState(AgentState):
+    context_summary: NotRequired[ContextSummary]
+
+
+def split_turns(messages: list[AnyMessage]) -> list[list[AnyMessage]]:
+    """Groups messages into turns, each starting at a user message"""
+    turns: list[list[AnyMessage]] = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def compact(message: AnyMessage) -> AnyMessage:
+    """Truncates large tool outputs (SQL rows, interpreter JSON) from earlier turns"""
+    limit = agent_config.context_window.tool_output_chars
+    if not isinstance(message, ToolMessage) or not isinstance(message.content, str):
+        return message
+    if len(message.content) <= limit:
+        return message
+    dropped = len(message.content) - limit
+    return message.model_copy(
+        update={"content": f"{message.content[:limit]}… [{dropped} chars truncated]"}
+    )
+
+
+def summary_message(summary: ContextSummary) -> SystemMessage:
+    return SystemMessage(
+        content=f"Summary of the earlier conversation:\n{summary['text']}"
+    )
+
+
+async def summarize(
+    previous: ContextSummary | None, messages: list[AnyMessage]
+) -> ContextSummary:
+    """Folds `messages` into the rolling summary, reusing the previous summary text"""
+    window = agent_config.context_window
+    transcript = get_buffer_string(messages)
+    if previous:
+        transcript = (
+            f"Existing summary:\n{previous['text']}\n\nNew messages:\n{transcript}"
+        )
+
+    response = await load_agent_model(window.summary_model, "summarizer").ainvoke(
+        [
+            SystemMessage(content=window.summary_prompt),
+            HumanMessage(content=transcript),
+        ]
+    )
+    return {"through_id": messages[-1].id or "", "text": str(response.content)}
+
+
+def make_context_hook(summarize_history: bool):
+    """Creates a pre-model hook that trims the history sent to the LLM.
+
+    The last `keep_last_turns` turns are sent verbatim and tool outputs from older
+    turns are truncated. If that still exceeds `max_tokens`, older turns are replaced
+    by a rolling summary stored in the checkpointed state, so it is only extended when
+    new turns fall out of the window. Agents that do not summarize reuse the stored
+    summary and otherwise drop the oldest turns.
+    """
+    window = agent_config.context_window
+
+    async def context_hook(state: ContextState) -> dict:
+        messages = state["messages"]
+        turns = split_turns(messages)
+        if len(turns) <= window.keep_last_turns:
+            return {"llm_input_messages": messages}
+
+        older = [compact(m) for turn in turns[: -window.keep_last_turns] for m in turn]
+        recent = [m for turn in turns[-window.keep_last_turns :] for m in turn]
+        if count_tokens_approximately(older + recent) <= window.max_tokens:
+            return {"llm_input_messages": older + recent}
+
+        summary = state.get("context_summary")
+        ids = [m.id for m in older]
+        start = 0
+        if summary and summary["through_id"] in ids:
+            start = ids.index(summary["through_id"]) + 1
+        unsummarized = older[start:]
+
+        if summarize_history and unsummarized:
+            summary = await summarize(summary if start else None, unsummarized)
+            return {
+                "llm_input_messages": [summary_message(summary), *recent],
+                "context_summary": summary,
+            }
+
+        kept = split_turns(unsummarized)
+        prefix = [summary_message(summary)] if summary and start else []
+        while kept and (
+            count_tokens_approximately(
+                prefix + [m for turn in kept for m in turn] + recent
+            )
+            > window.max_tokens
+        ):
+            kept.pop(0)
+        return {
+            "llm_input_messages": prefix + [m for turn in kept for m in turn] + recent
+        }
+
+    return context_hook
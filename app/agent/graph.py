@@ -2,47 +2,90 @@
 Module for agent and multi-agent creation and configuration.
 """
 
+import re
 from datetime import date
 
+from langchain_core.messages import AnyMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
 from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
 from langgraph.prebuilt import create_react_agent
+from langgraph.prebuilt.chat_agent_executor import AgentState
 from langgraph_supervisor import create_supervisor
 
 from app.agent.agent_config import agent_config
-from app.agent.tools import get_tools, load_chat_model
+from app.agent.context import ContextState, make_context_hook
+from app.agent.hotels import encode_hotels
+from app.agent.models import load_agent_model
+from app.agent.tools import get_tools
 from app.config import settings
 from app.schemas.core import Agent, GraphConfiguration, Hotel
 
 URL = settings.interpreter_url
 
 
-def make_agent(config: Agent):
+def cacheable_prompt(system_prompt: str, context: str):
+    """Builds a prompt whose static system prefix stays byte-identical across requests.
+
+    Per-request values (date, hotels, application, URL) go in a second system message
+    so the provider's prompt prefix cache can reuse the instruction block.
+    """
+    static_message = SystemMessage(content=system_prompt)
+    context_message = SystemMessage(content=context)
+
+    def prompt(state: AgentState) -> list[AnyMessage]:
+        return [static_message, context_message, *state["messages"]]
+
+    return prompt
+
+
+def prefetched_schema_prompt(system_prompt: str, context: str):
+    """Like `cacheable_prompt`, adding the schema prefetched for the run (if any)
+    after the context message"""
+    base = cacheable_prompt(system_prompt, context)
+
+    async def prompt(state: AgentState, config: RunnableConfig) -> list[AnyMessage]:
+        messages = base(state)
+        prefetch = config.get("configurable", {}).get("schema_prefetch")
+        if prefetch is not None and (schema := await prefetch.result()):
+            content = agent_config.prefetched_schema.format(schema=schema)
+            messages.insert(2, SystemMessage(content=content))
+        return messages
+
+    return prompt
+
+
+def make_agent(config: Agent, prompt=cacheable_prompt):
     """Creates individual agents with specified model, tools, prompt, and name configuration"""
     return create_react_agent(
-        model=load_chat_model(config["model"]),
+        model=load_agent_model(config["model"], config["name"]),
         tools=get_tools(config["selected_tools"]),
-        prompt=config["system_prompt"],
+        prompt=prompt(config["system_prompt"], config["context"]),
         name=config["name"],
+        state_schema=ContextState,
+        pre_model_hook=make_context_hook(summarize_history=False),
     )
 
 
-def create_subagents(hotels: list[Hotel] | str):
+def create_subagents(hotels: list[Hotel]):
     """Creates subagents for SQL and Analysis tasks based on the provided hotels"""
 
     sql_config: Agent = {
         "model": agent_config.sql_agent_model,
-        "system_prompt": agent_config.sql_agent_prompt.format(
-            today=date.today(), hotels=hotels
+        "system_prompt": agent_config.sql_agent_prompt,
+        "context": agent_config.sql_agent_context.format(
+            today=date.today(), hotels=encode_hotels(hotels)
         ),
         "selected_tools": agent_config.sql_agent_tools,
         "name": "sql_agent",
     }
 
-    sql_agent = make_agent(sql_config)
+    sql_agent = make_agent(sql_config, prompt=prefetched_schema_prompt)
 
     analysis_config: Agent = {
         "model": agent_config.analysis_agent_model,
-        "system_prompt": agent_config.analysis_agent_prompt.format(
+        "system_prompt": agent_config.analysis_agent_prompt,
+        "context": agent_config.analysis_agent_context.format(
             today=date.today(), url=URL
         ),
         "selected_tools": agent_config.analysis_agent_tools,
@@ -54,6 +97,35 @@ def create_subagents(hotels: list[Hotel] | str):
     return [sql_agent, analysis_agent]
 
 
+SQL_ANSWER = re.compile(r"\b(SELECT|WITH)\b", re.I)
+
+
+def returned_sql(state: ContextState) -> str:
+    """Routes to the analysis agent only if the SQL agent produced a query"""
+    content = str(state["messages"][-1].content)
+    if content.lstrip().startswith("/* Error") or not SQL_ANSWER.search(content):
+        return END
+    return "analysis_agent"
+
+
+def create_data_agent(sql_agent, analysis_agent):
+    """Chains the SQL agent straight into the analysis agent, skipping the supervisor
+    hop in between. Only the SQL agent's final message is passed on, as the
+    supervisor would have done."""
+
+    async def write_sql(state: ContextState, config: RunnableConfig):
+        result = await sql_agent.ainvoke(state, config)
+        return {"messages": [result["messages"][-1]]}
+
+    builder = StateGraph(ContextState)
+    builder.add_node("sql_agent", write_sql)
+    builder.add_node("analysis_agent", analysis_agent)
+    builder.add_edge(START, "sql_agent")
+    builder.add_conditional_edges("sql_agent", returned_sql, ["analysis_agent", END])
+    builder.add_edge("analysis_agent", END)
+    return builder.compile(name="data_agent")
+
+
 memory = MemorySaver()
 
 
@@ -66,18 +138,28 @@ def create_graph(config: GraphConfiguration):
     hotels = config.get("selected_hotels", [])
 
     subagents = create_subagents(hotels)
+    supervisor_prompt = agent_config.supervisor_prompt
+    if agent_config.graph_mode == "direct":
+        subagents.append(create_data_agent(*subagents))
+        supervisor_prompt += agent_config.direct_handoff_prompt
 
     supervisor = create_supervisor(
         agents=subagents,  # type: ignore
-        model=load_chat_model(agent_config.supervisor_model),
-        prompt=agent_config.supervisor_prompt.format(
-            today=date.today(),
-            hotels=hotels,
-            url=URL,
-            application=application["name"],
-            description=application["description"],
+        model=load_agent_model(agent_config.supervisor_model, "supervisor"),
+        tools=get_tools(agent_config.supervisor_tools),
+        prompt=cacheable_prompt(
+            supervisor_prompt,
+            agent_config.supervisor_context.format(
+                today=date.today(),
+                hotels=encode_hotels(hotels),
+                url=URL,
+                application=application["name"],
+                description=application["description"],
+            ),
         ),
         output_mode="last_message",
+        state_schema=ContextState,
+        pre_model_hook=make_context_hook(summarize_history=True),
     )
 
     return supervisor.compile(checkpointer=memory)
@@ -0,0 +1,38 @@
+"""
+Compact encoding of the selected hotels for agent prompts.
+
+Small selections are listed inline as `ID name` pairs. Large ones (management
+companies often select hundreds of properties) are sent as a bare ID list and
+the agents resolve names on demand with the `hotel_lookup` tool, which reads the
+selection from the run config.
+"""
+
+from app.agent.agent_config import agent_config
+from app.schemas.core import Hotel
+
+
+def encode_hotels(hotels: list[Hotel]) -> str:
+    """Renders the selection for the session context message"""
+    if not hotels:
+        return "none"
+    if len(hotels) <= agent_config.hotel_inline_limit:
+        return "; ".join(f"{hotel['id']} {hotel['name']}" for hotel in hotels)
+    ids = ",".join(str(hotel["id"]) for hotel in hotels)
+    return (
+        f"{len(hotels)} hotels, HOTEL_IDs {ids}. "
+        "Use the hotel_lookup tool to resolve names."
+    )
+
+
+def lookup_hotels(hotels: list[Hotel], query: str) -> list[Hotel]:
+    """Selected hotels whose ID is listed in `query` or whose name contains it"""
+    terms = [term.strip() for term in query.replace(";", ",").split(",") if term.strip()]
+    if not terms:
+        return list(hotels)
+    ids = {term for term in terms if term.isdigit()}
+    names = [term.lower() for term in terms if not term.isdigit()]
+    return [
+        hotel
+        for hotel in hotels
+        if str(hotel["id"]) in ids or any(name in hotel["name"].lower() for name in names)
+    ]
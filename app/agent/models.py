@@ -0,0 +1,160 @@
+"""
+Module for tiered chat models with per-call timeouts and hedged requests.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Sequence
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import Runnable
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from app.agent.agent_config import agent_config
+from app.agent.tools import load_chat_model
+from app.metrics import llm_call_seconds, llm_latency, prompt_cache
+from app.usage import current_turn
+
+logger = logging.getLogger(__name__)
+
+
+class HedgedChatModel(BaseChatModel):
+    """Chat model that records latency per agent and optionally hedges slow calls.
+
+    When `hedge_after` is set and the primary call has not finished within that many
+    seconds, an identical request is sent through `backup` and whichever completes
+    first wins; the other is cancelled and counted in the turn's usage.
+    """
+
+    primary: BaseChatModel
+    backup: BaseChatModel | None = None
+    hedge_after: float | None = None
+    provider_model: str
+    agent: str
+
+    @property
+    def _llm_type(self) -> str:
+        return "hedged"
+
+    def bind_tools(
+        self,
+        tools: Sequence[Any],
+        *,
+        tool_choice: Any = None,
+        parallel_tool_calls: bool | None = None,
+        **kwargs: Any,
+    ) -> Runnable:
+        if tool_choice is not None:
+            kwargs["tool_choice"] = tool_choice
+        if parallel_tool_calls is not None:
+            kwargs["parallel_tool_calls"] = parallel_tool_calls
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _bound(self, model: BaseChatModel, stop: list[str] | None, **kwargs: Any):
+        tools = kwargs.pop("tools", None)
+        if stop is not None:
+            kwargs["stop"] = stop
+        return model.bind_tools(tools, **kwargs) if tools else model.bind(**kwargs)
+
+    def _result(self, message: AIMessage, elapsed: float) -> ChatResult:
+        llm_latency.observe(elapsed, self.agent, self.provider_model)
+        llm_call_seconds.labels(self.agent, self.provider_model).observe(elapsed)
+        if usage := message.usage_metadata:
+            cached = usage.get("input_token_details", {}).get("cache_read", 0)
+            prompt_cache.observe(
+                usage["input_tokens"], cached, self.agent, self.provider_model
+            )
+            if turn := current_turn():
+                turn.record_model(self.agent, self.provider_model, usage)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        start = time.perf_counter()
+        message = self._bound(self.primary, stop, **kwargs).invoke(messages)
+        return self._result(message, time.perf_counter() - start)
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        start = time.perf_counter()
+        pending = {
+            asyncio.create_task(
+                self._bound(self.primary, stop, **kwargs).ainvoke(messages)
+            )
+        }
+
+        try:
+            if self.backup is not None and self.hedge_after is not None:
+                done, _ = await asyncio.wait(pending, timeout=self.hedge_after)
+                if not done:
+                    logger.info(
+                        "Hedging %s call to %s after %.1fs",
+                        self.agent,
+                        self.provider_model,
+                        self.hedge_after,
+                    )
+                    pending.add(
+                        asyncio.create_task(
+                            self._bound(self.backup, stop, **kwargs).ainvoke(messages)
+                        )
+                    )
+
+            error: BaseException | None = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        message = task.result()
+                        if pending and (turn := current_turn()):
+                            usage = message.usage_metadata or {}
+                            turn.record_hedge(
+                                self.agent,
+                                self.provider_model,
+                                usage.get("input_tokens", 0),
+                            )
+                        return self._result(message, time.perf_counter() - start)
+                    error = task.exception()
+            raise error  # type: ignore[misc]
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+def load_agent_model(tier_name: str, agent: str) -> BaseChatModel:
+    """Builds the chat model for an agent from a tier configured in `AgentConfig.model_tiers`"""
+    try:
+        tier = agent_config.model_tiers[tier_name]
+    except KeyError as ke:
+        raise ValueError(f"Unknown model tier: '{tier_name}'") from ke
+
+    def build() -> BaseChatModel:
+        return load_chat_model(
+            tier.model, timeout=tier.timeout, max_retries=tier.max_retries
+        )
+
+    return HedgedChatModel(
+        primary=build(),
+        backup=build() if tier.hedge_after is not None else None,
+        hedge_after=tier.hedge_after,
+        provider_model=tier.model,
+        agent=agent,
+    )
@@ -0,0 +1,52 @@
+"""
+Speculative schema retrieval on the raw user message.
+
+The retrieval starts alongside the supervisor's first LLM call, so by the time
+the SQL agent runs its schema excerpts are usually ready and are added to its
+prompt. The outcome is recorded per run: a hit when the SQL agent did not need
+its own `schema_retriever` call afterwards, a miss when it did, and unused when
+the SQL agent never ran.
+"""
+
+import asyncio
+import logging
+from typing import Callable
+
+from app.config import settings
+from app.metrics import schema_prefetch, timed
+
+logger = logging.getLogger(__name__)
+
+
+class SchemaPrefetch:
+    def __init__(self, retrieve: Callable[[str], str], question: str):
+        self.used = False
+        self.followups = 0
+        self._task = asyncio.create_task(self._retrieve(retrieve, question))
+
+    @staticmethod
+    async def _retrieve(retrieve: Callable[[str], str], question: str) -> str:
+        with timed("schema_prefetch"):
+            return await asyncio.to_thread(retrieve, question)
+
+    async def result(self) -> str | None:
+        """The prefetched schema, or None if it failed or is not ready in time"""
+        try:
+            schema = await asyncio.wait_for(
+                asyncio.shield(self._task), timeout=settings.schema_prefetch_wait
+            )
+        except asyncio.TimeoutError:
+            return None
+        except Exception as e:
+            logger.warning("Schema prefetch failed: %s", e)
+            return None
+        self.used = True
+        return schema
+
+    def record(self) -> None:
+        """Cancels the retrieval if still running and records how the run used it"""
+        self._task.cancel()
+        if not self.used:
+            schema_prefetch.labels("unused").inc()
+        else:
+            schema_prefetch.labels("miss" if self.followups else "hit").inc()
@@ -0,0 +1,413 @@
+"""
+Module for graph runs that outlive the HTTP request streaming them.
+
+Runs take an admission ticket when submitted, so waiting runs count towards the
+admission queue limits and the per-organization round-robin decides which run is
+dispatched next, interactive runs ahead of scheduled ones. Only admitted runs are
+handed to the worker pool, which has at least a worker per admission slot.
+
+Each run appends its events to a bounded log with sequential ids; clients
+subscribe from any id, so a dropped connection can reconnect with `Last-Event-ID`
+and replay what it missed, or poll the run's status instead. When the events
+after that id have already been dropped from the log, the client first gets a
+`reset` event saying how many it missed, so it knows to poll. Run records are
+persisted in the run store so runs left unfinished by a stopped process are queued
+again on startup.
+
+Runs on the same thread never execute concurrently: a run submitted while
+another is active on its thread waits behind it (or is rejected, depending on
+THREAD_CONFLICT), and a repeat of the message already running is answered by
+attaching to that run instead of starting a second one.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import time
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Callable
+
+from app.admission import AdmissionRejected, Ticket, admission
+from app.config import settings
+from app.database.run_store import run_store
+from app.metrics import run_queue_depth, thread_run_conflicts
+from app.schemas.chat import ChatRequest
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = {"interactive": 0, "scheduled": 1}
+PRIORITY_NAMES = {value: name for name, value in PRIORITIES.items()}
+
+Producer = Callable[["Run"], AsyncIterator[dict[str, Any]]]
+
+
+class ThreadBusy(Exception):
+    """Raised when a thread already has a run in flight and no room to queue another."""
+
+    def __init__(self, active_run_id: str):
+        super().__init__(f"Thread is busy with run {active_run_id}")
+        self.active_run_id = active_run_id
+
+
+class Run:
+    def __init__(
+        self,
+        run_id: str,
+        thread_id: str,
+        database: str,
+        request: ChatRequest,
+        priority: str = "interactive",
+        cancel_when_abandoned: bool = False,
+        recovered: bool = False,
+    ):
+        self.id = run_id
+        self.thread_id = thread_id
+        self.database = database
+        self.request = request
+        self.priority = priority
+        self.cancel_when_abandoned = cancel_when_abandoned
+        self.recovered = recovered
+        self.status = "queued"
+        self.result: str | None = None
+        self.events: deque[tuple[int, dict[str, Any]]] = deque(
+            maxlen=settings.run_event_log_size
+        )
+        self.next_seq = 1
+        self.done = False
+        self.finished_at: float | None = None
+        self.subscribers = 0
+        self.task: asyncio.Task | None = None
+        self.ticket: Ticket | None = None
+        self.admitting: asyncio.Task | None = None
+        self._wakeups: set[asyncio.Event] = set()  # one per subscriber
+
+    def emit(self, event: dict[str, Any]) -> None:
+        self.events.append((self.next_seq, event))
+        self.next_seq += 1
+        if event.get("event") == "message":
+            self.result = event.get("data")
+        elif event.get("event") == "error":
+            self.status = "failed"
+        self._notify()
+
+    def finish(self, status: str) -> None:
+        self.status = status
+        self.done = True
+        self.finished_at = time.monotonic()
+        self._notify()
+
+    def _notify(self) -> None:
+        for wakeup in self._wakeups:
+            wakeup.set()
+
+    async def consume(self, producer: AsyncIterator[dict[str, Any]]) -> None:
+        self.status = "running"
+        run_store.update(self.id, "running")
+        try:
+            async for event in producer:
+                self.emit(event)
+        except asyncio.CancelledError:
+            if runs.stopping:
+                # left "running" in the store so the next process picks it up
+                logger.info("Run %s interrupted by shutdown", self.id)
+                self.finish("interrupted")
+                return
+            logger.info("Run %s cancelled", self.id)
+            self.finish("cancelled")
+        else:
+            self.finish("failed" if self.status == "failed" else "done")
+        run_store.update(self.id, self.status, self.result)
+        runs.release(self)
+
+    async def subscribe(self, after: int = 0) -> AsyncIterator[dict[str, Any]]:
+        """Yields logged events with a sequence number above `after`, then live ones.
+        A `reset` event stands in for any that were dropped from the bounded log."""
+        wakeup = asyncio.Event()
+        self._wakeups.add(wakeup)
+        self.subscribers += 1
+        try:
+            while True:
+                wakeup.clear()
+                # read before the snapshot: events emitted while this subscriber is
+                # paused at a yield are picked up by the next pass
+                done = self.done
+                logged = list(self.events)
+                if logged and logged[0][0] > after + 1:
+                    missed = logged[0][0] - after - 1
+                    after = logged[0][0] - 1
+                    yield {
+                        "event": "reset",
+                        "data": json.dumps({"runId": self.id, "missed": missed}),
+                        "id": f"{self.id}:{after}",
+                    }
+                for seq, event in logged:
+                    if seq > after:
+                        after = seq
+                        yield {**event, "id": f"{self.id}:{seq}"}
+                if done:
+                    return
+                await wakeup.wait()
+        finally:
+            self._wakeups.discard(wakeup)
+            self.subscribers -= 1
+            if not self.subscribers and not self.done and self.cancel_when_abandoned:
+                asyncio.get_running_loop().call_later(
+                    settings.run_disconnect_grace, self._cancel_if_abandoned
+                )
+
+    def _cancel_if_abandoned(self) -> None:
+        if not self.subscribers and not self.done:
+            logger.info("No client reattached to run %s; cancelling", self.id)
+            runs.cancel(self.id)
+
+
+class RunRegistry:
+    def __init__(self):
+        self.runs: dict[str, Run] = {}
+        self.queue: asyncio.PriorityQueue | None = None
+        self.workers: list[asyncio.Task] = []
+        self.producer: Producer | None = None
+        self.stopping = False
+        self.active: dict[str, Run] = {}  # thread_id -> run executing or next up
+        self.waiting: dict[str, deque[Run]] = {}  # thread_id -> runs queued behind
+        self.latest: dict[str, Run] = {}  # thread_id -> most recently submitted run
+        self._order = itertools.count()
+
+    def _evict(self) -> None:
+        cutoff = time.monotonic() - settings.run_retention
+        for run_id, run in list(self.runs.items()):
+            if run.finished_at is not None and run.finished_at < cutoff:
+                del self.runs[run_id]
+                if self.latest.get(run.thread_id) is run:
+                    del self.latest[run.thread_id]
+        run_store.purge(time.time() - settings.run_store_retention)
+
+    def _enqueue(self, run: Run) -> None:
+        self.queue.put_nowait((PRIORITIES[run.priority], next(self._order), run))
+        run_queue_depth.labels(run.priority).inc()
+
+    def _admit(self, run: Run, ticket: Ticket | None = None) -> None:
+        """Waits for the run's admission slot in the background, then queues it for a
+        worker. Runs without a ticket were accepted earlier and may exceed the
+        admission queue limits."""
+        run.ticket = ticket or admission.enter(
+            run.request.organization_id, PRIORITIES[run.priority], force=True
+        )
+        run.admitting = asyncio.create_task(self._await_admission(run))
+
+    async def _await_admission(self, run: Run) -> None:
+        try:
+            async for position in admission.wait(run.ticket):
+                run.emit({"event": "queued", "data": json.dumps({"position": position})})
+        except AdmissionRejected as e:
+            logger.info("Run %s rejected by admission control: %s", run.id, e.reason)
+            run.emit(
+                {
+                    "event": "error",
+                    "data": json.dumps(
+                        {
+                            "message": "Othelia is busy. Please try again shortly.",
+                            "retryAfter": e.retry_after,
+                        }
+                    ),
+                }
+            )
+            run.finish("failed")
+            run_store.update(run.id, "failed")
+            self.release(run)
+            return
+        if run.status == "queued":
+            self._enqueue(run)
+
+    def _schedule(self, run: Run, ticket: Ticket | None = None) -> None:
+        """Admits the run, or queues it behind the run active on its thread"""
+        self.runs[run.id] = run
+        self.latest[run.thread_id] = run
+        if run.thread_id not in self.active:
+            self.active[run.thread_id] = run
+            self._admit(run, ticket)
+            return
+        waiting = self.waiting.setdefault(run.thread_id, deque())
+        waiting.append(run)
+        run.emit({"event": "queued", "data": json.dumps({"position": len(waiting)})})
+
+    def release(self, run: Run) -> None:
+        """Called when a run ends; frees its admission slot and admits the next run
+        waiting on its thread"""
+        if run.ticket is not None:
+            admission.leave(run.ticket)
+            run.ticket = None
+        waiting = self.waiting.get(run.thread_id, deque())
+        if run in waiting:
+            waiting.remove(run)
+        if self.active.get(run.thread_id) is run:
+            del self.active[run.thread_id]
+            while waiting:
+                following = waiting.popleft()
+                if following.status == "queued":
+                    self.active[run.thread_id] = following
+                    self._admit(following)
+                    break
+        if not waiting:
+            self.waiting.pop(run.thread_id, None)
+
+    def duplicate_of(self, thread_id: str, text: str) -> Run | None:
+        """The thread's latest run if it carries the same message and is still queued
+        or running; a repeat after the run ended is a new question"""
+        run = self.latest.get(thread_id)
+        if run is None or run.status not in ("queued", "running"):
+            return None
+        if run.request.message["text"].strip() != text.strip():
+            return None
+        thread_run_conflicts.labels("attached").inc()
+        return run
+
+    def start_workers(self, producer: Producer, workers: int) -> None:
+        """Starts the worker pool and queues runs a previous process left unfinished.
+
+        Admitted runs hold an admission slot, so there are never fewer workers than
+        slots: an admitted run must not wait for a worker.
+        """
+        self.producer = producer
+        self.stopping = False
+        self.queue = asyncio.PriorityQueue()
+        for record in run_store.unfinished():
+            logger.info("Recovering run %s (%s)", record["id"], record["status"])
+            self._schedule(
+                Run(
+                    record["id"],
+                    record["thread_id"],
+                    record["database"],
+                    ChatRequest.model_validate(json.loads(record["request"])),
+                    priority=PRIORITY_NAMES.get(record["priority"], "scheduled"),
+                    recovered=record["status"] == "running",
+                )
+            )
+        workers = max(workers, admission.global_limit)
+        self.workers = [asyncio.create_task(self._worker()) for _ in range(workers)]
+
+    async def stop_workers(self) -> None:
+        self.stopping = True
+        for worker in self.workers:
+            worker.cancel()
+        for run in self.runs.values():
+            if run.admitting is not None:
+                run.admitting.cancel()
+            if run.task is not None and not run.done:
+                run.task.cancel()
+        await asyncio.gather(
+            *self.workers,
+            *(run.task for run in self.runs.values() if run.task is not None),
+            return_exceptions=True,
+        )
+        self.workers = []
+
+    async def _worker(self) -> None:
+        while True:
+            _, _, run = await self.queue.get()
+            run_queue_depth.labels(run.priority).dec()
+            if run.status != "queued":  # cancelled while waiting
+                continue
+            run.task = asyncio.create_task(run.consume(self.producer(run)))
+            await asyncio.wait({run.task})
+
+    def submit(
+        self,
+        chat_request: ChatRequest,
+        thread_id: str,
+        database: str,
+        priority: str = "interactive",
+        cancel_when_abandoned: bool = False,
+    ) -> Run:
+        """Persists a run and queues it for the worker pool.
+
+        Raises ThreadBusy if the thread has a run in flight and THREAD_CONFLICT is
+        "reject" or THREAD_QUEUE_LIMIT runs are already waiting behind it, and
+        AdmissionRejected if the admission queue is full.
+        """
+        if self.queue is None:
+            raise RuntimeError("Run workers have not been started")
+        self._evict()
+        if active := self.active.get(thread_id):
+            waiting = self.waiting.get(thread_id, ())
+            if (
+                settings.thread_conflict == "reject"
+                or len(waiting) >= settings.thread_queue_limit
+            ):
+                thread_run_conflicts.labels("rejected").inc()
+                raise ThreadBusy(active.id)
+            thread_run_conflicts.labels("queued").inc()
+        ticket = (
+            None
+            if active
+            else admission.enter(chat_request.organization_id, PRIORITIES[priority])
+        )
+        run = Run(
+            str(uuid.uuid4()),
+            thread_id,
+            database,
+            chat_request,
+            priority=priority,
+            cancel_when_abandoned=cancel_when_abandoned,
+        )
+        run_store.save(
+            run.id,
+            thread_id,
+            database,
+            PRIORITIES[priority],
+            chat_request.model_dump(mode="json", by_alias=True),
+        )
+        self._schedule(run, ticket)
+        return run
+
+    def cancel(self, run_id: str) -> bool:
+        """Cancels a queued or running run; returns False if it is unknown or finished"""
+        run = self.runs.get(run_id)
+        if run is None or run.done:
+            return False
+        if run.task is not None:
+            run.task.cancel()
+        else:
+            if run.admitting is not None:
+                run.admitting.cancel()
+            run.finish("cancelled")
+            run_store.update(run.id, "cancelled")
+            self.release(run)
+        return True
+
+    def status(self, run_id: str) -> dict[str, Any] | None:
+        """Current state of a run, from memory or from the run store once evicted"""
+        if run := self.runs.get(run_id):
+            return {
+                "run_id": run.id,
+                "thread_id": run.thread_id,
+                "database": run.database,
+                "priority": run.priority,
+                "status": run.status,
+                "result": run.result,
+            }
+        if record := run_store.get(run_id):
+            return {
+                "run_id": record["id"],
+                "thread_id": record["thread_id"],
+                "database": record["database"],
+                "priority": PRIORITY_NAMES.get(record["priority"], "scheduled"),
+                "status": record["status"],
+                "result": record["result"],
+            }
+        return None
+
+    def resume(self, last_event_id: str | None) -> tuple[Run, int] | None:
+        """Finds the run and sequence number a `Last-Event-ID` header points at"""
+        if not last_event_id:
+            return None
+        run_id, _, seq = last_event_id.rpartition(":")
+        run = self.runs.get(run_id)
+        if run is None or not seq.isdigit():
+            return None
+        return run, int(seq)
+
+
+runs = RunRegistry()
@@ -0,0 +1,175 @@
+"""
+Cache of web search results keyed by the normalized query.
+
+Benchmarking questions repeat across organizations and threads, so results are
+kept in an in-memory TTL + LRU cache and, when WEB_SEARCH_CACHE_PATH is set, in a
+SQLite file that survives restarts. Hits are reported with the latency they
+saved, estimated from the average latency of recent uncached searches. Identical
+queries that miss at the same time share one search.
+"""
+
+import asyncio
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import deque
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from app.cache import TTLCache
+from app.config import settings
+from app.metrics import web_search_cache, web_search_saved_seconds
+
+PUNCTUATION = re.compile(r"[^\w\s%$€£.-]|(?<!\d)\.|\.(?!\d)")
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(query: str) -> str:
+    """Case, accents, punctuation and spacing differences map to the same key"""
+    text = unicodedata.normalize("NFKD", query).casefold()
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    text = PUNCTUATION.sub(" ", text)
+    return WHITESPACE.sub(" ", text).strip()
+
+
+class DiskStore:
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS searches (
+                    query TEXT PRIMARY KEY,
+                    result TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+                """
+            )
+        return self._conn
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            row = (
+                self._connection()
+                .execute(
+                    "SELECT result, expires_at FROM searches WHERE query = ?", (key,)
+                )
+                .fetchone()
+            )
+        if row is None or row[1] < time.time():
+            return None
+        return json.loads(row[0])
+
+    def set(self, key: str, result: Any, ttl: float) -> None:
+        now = time.time()
+        with self._lock, self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO searches VALUES (?, ?, ?)",
+                (key, json.dumps(result, default=str), now + ttl),
+            )
+            conn.execute("DELETE FROM searches WHERE expires_at < ?", (now,))
+
+
+class SearchCache:
+    def __init__(self, maxsize: int, ttl: float, path: str | None = None):
+        self.ttl = ttl
+        self.memory: TTLCache[str, Any] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.disk = DiskStore(path) if path else None
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+        self.shared = 0  # misses that waited for an identical search in flight
+        self.saved_seconds = 0.0
+        self._latencies: deque[float] = deque(maxlen=100)
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    def _hit(self, source: str) -> None:
+        self.hits[source] += 1
+        web_search_cache.labels(source).inc()
+        if self._latencies:
+            saved = sum(self._latencies) / len(self._latencies)
+            self.saved_seconds += saved
+            web_search_saved_seconds.inc(saved)
+
+    async def get_or_search(
+        self, query: str, search: Callable[[str], Awaitable[Any]]
+    ) -> Any:
+        """Returns the cached result for `query`, calling `search` on a miss"""
+        key = normalize(query)
+        if (result := self.memory.get(key)) is not None:
+            self._hit("memory")
+            return result
+        if (
+            self.disk is not None
+            and (result := await asyncio.to_thread(self.disk.get, key)) is not None
+        ):
+            self.memory.set(key, result)
+            self._hit("disk")
+            return result
+
+        if (inflight := self._inflight.get(key)) is not None:
+            self.shared += 1
+            web_search_cache.labels("shared").inc()
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # the caller running the search was cancelled; search again
+                return await self.get_or_search(query, search)
+
+        self.misses += 1
+        web_search_cache.labels("miss").inc()
+        inflight = asyncio.get_running_loop().create_future()
+        self._inflight[key] = inflight
+        try:
+            start = time.perf_counter()
+            result = await search(query)
+            self._latencies.append(time.perf_counter() - start)
+            if not (isinstance(result, dict) and "error" in result):
+                self.memory.set(key, result)
+                if self.disk is not None:
+                    await asyncio.to_thread(self.disk.set, key, result, self.ttl)
+            inflight.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            inflight.cancel()
+            raise
+        except Exception as e:
+            inflight.set_exception(e)
+            inflight.exception()  # retrieved here when no other caller waits
+            raise
+        finally:
+            del self._inflight[key]
+
+    def summary(self) -> dict[str, Any]:
+        hits = sum(self.hits.values())
+        lookups = hits + self.misses
+        return {
+            "entries": len(self.memory),
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared": self.shared,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "saved_seconds": round(self.saved_seconds, 2),
+            "avg_search_seconds": round(
+                sum(self._latencies) / len(self._latencies), 3
+            )
+            if self._latencies
+            else None,
+        }
+
+
+search_cache = SearchCache(
+    maxsize=settings.web_search_cache_size,
+    ttl=settings.web_search_cache_ttl,
+    path=settings.web_search_cache_path or None,
+)
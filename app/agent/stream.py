@@ -0,0 +1,163 @@
+"""
+Module that executes a graph run and translates its updates into SSE events.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import TYPE_CHECKING, Any, AsyncIterator
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+
+from app.agent.agent_config import agent_config
+from app.agent.graph import create_graph
+from app.agent.prefetch import SchemaPrefetch
+from app.agent.tools import retrieve_schema
+from app.config import settings
+from app.database.usage_store import usage_store
+from app.metrics import inflight_streams, timed
+from app.usage import TurnUsage, start_turn
+
+if TYPE_CHECKING:
+    from app.agent.runs import Run
+
+logger = logging.getLogger(__name__)
+
+
+class ToolTimer(BaseCallbackHandler):
+    """Records the execution time of every tool call in a run's TurnUsage"""
+
+    run_inline = True
+
+    def __init__(self, turn: TurnUsage):
+        self.turn = turn
+        self._started: dict[UUID, tuple[str, float]] = {}
+
+    def on_tool_start(
+        self, serialized: dict[str, Any], input_str: str, *, run_id: UUID, **kwargs
+    ) -> None:
+        name = (serialized or {}).get("name") or kwargs.get("name") or "unknown"
+        self._started[run_id] = (name, time.perf_counter())
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs) -> None:
+        if started := self._started.pop(run_id, None):
+            self.turn.record_tool(started[0], time.perf_counter() - started[1])
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs) -> None:
+        self.on_tool_end(None, run_id=run_id)
+
+
+async def graph_events(run: "Run") -> AsyncIterator[dict[str, Any]]:
+    """Runs the supervisor graph for an admitted `run` and yields the events streamed
+    to clients.
+
+    A run recovered after a restart continues from its thread's last checkpoint when
+    the graph was interrupted mid-way, otherwise it starts again from the message.
+    Token, cost, tool and warehouse usage is sent with the `done` event and saved
+    to the usage store, also for runs that fail part-way.
+    """
+    chat_request = run.request
+    prefetch = None
+    turn = None
+    inflight_streams.inc()
+    try:
+        with timed("graph_construction"):
+            graph = create_graph(
+                {
+                    "application": chat_request.application,
+                    "selected_hotels": chat_request.selected_hotels,
+                }
+            )
+
+        turn = start_turn()
+        config = RunnableConfig(
+            callbacks=[ToolTimer(turn)],
+            configurable={
+                "thread_id": run.thread_id,
+                "database": run.database,
+                "selected_hotels": chat_request.selected_hotels,
+            },
+        )
+        graph_input: dict | None = {
+            "messages": [HumanMessage(content=chat_request.message["text"])]
+        }
+        if run.recovered and (await graph.aget_state(config)).next:
+            logger.info("Resuming run %s from its last checkpoint", run.id)
+            graph_input = None
+        elif settings.schema_prefetch:
+            # runs alongside the supervisor's routing call
+            prefetch = SchemaPrefetch(retrieve_schema, chat_request.message["text"])
+            config["configurable"]["schema_prefetch"] = prefetch
+
+        async for chunk in graph.astream(
+            graph_input, config=config, stream_mode="updates"
+        ):
+            event = None
+            data = None
+
+            supervisor_msgs = chunk.get("supervisor", {}).get("messages", [])
+
+            for msg in supervisor_msgs[-1:]:
+                if isinstance(msg, AIMessage):
+                    event = "message"
+                    data = msg.content
+                elif (
+                    isinstance(msg, ToolMessage) and msg.name in agent_config.route_config
+                ):
+                    event = "route"
+                    data = json.dumps(
+                        {
+                            "destination": agent_config.route_config[msg.name]["name"],
+                            "message": agent_config.route_config[msg.name]["message"],
+                        }
+                    )
+
+            if event is not None:
+                yield {"event": event, "data": data}
+
+        yield {
+            "event": "done",
+            "data": json.dumps(
+                {
+                    "threadId": run.thread_id,
+                    "database": run.database,
+                    "runId": run.id,
+                    "usage": turn.totals(),
+                }
+            ),
+        }
+
+    except asyncio.CancelledError:
+        logger.info("Graph run cancelled")
+        raise
+    except ValueError as ve:
+        logger.error("ValueError in stream: %s", str(ve), exc_info=True)
+        yield {
+            "event": "error",
+            "data": "Invalid input provided. Please try again.",
+        }
+    except Exception as e:
+        logger.error("Unexpected error in stream: %s", str(e), exc_info=True)
+        yield {
+            "event": "error",
+            "data": "An unexpected error occurred. Please try again later.",
+        }
+    finally:
+        if prefetch is not None:
+            prefetch.record()
+        if turn is not None and (rows := turn.rows()):
+            try:
+                usage_store.save(
+                    run.id,
+                    run.thread_id,
+                    chat_request.organization_id,
+                    run.database,
+                    rows,
+                )
+            except Exception as e:
+                logger.warning("Failed to save usage for run %s: %s", run.id, e)
+        inflight_streams.dec()
@@ -1,3 +1,5 @@
+import asyncio
+from functools import cache
 from typing import Any, Callable
 import httpx
 
@@ -7,11 +9,16 @@ from langchain_core.language_models import BaseChatModel
 from langchain.tools.retriever import create_retriever_tool
 from langchain_core.tools import tool
 from langchain_core.runnables import RunnableConfig
-from sqlalchemy.sql import text
 
+from app.agent.artifacts import dereference, offload
+from app.agent.hotels import lookup_hotels
+from app.agent.search_cache import search_cache
 from app.config import settings
-from app.database.snowflake import get_snowflake_conn
+from app.database.kpi import kpi_query
+from app.database.query import execute_query
+from app.schemas.error import SQLValidationError
 from app.database.vector_database.vector_db import get_or_create_vector_store
+from app.metrics import timed
 
 
 @tool
@@ -25,6 +32,12 @@ async def code_interpreter(code: str, config: RunnableConfig):
     A helper function `execute_sql(sql: str) -> pd.DataFrame` is available for querying Snowflake.
     Use it for SELECT queries and receive results as a pandas DataFrame.
     Always use dates in yyyymmdd format in your sql queries.
+    Columns come back typed: *_DATE columns are pandas datetimes (format with
+    .dt.strftime("%Y%m%d") when needed), repeated strings such as hotel names are
+    categoricals. Group categoricals with observed=True, e.g.
+    df.groupby("HOTEL_NAME", observed=True).sum(); otherwise every category,
+    including those filtered out, gets a row of zeros or NaN. Pass typed=False to
+    get the raw values instead.
     </execute_sql function>
 
     Return format:
@@ -51,19 +64,33 @@ async def code_interpreter(code: str, config: RunnableConfig):
     if database is None:
         raise ValueError("Database not found in config")
 
-    async with httpx.AsyncClient(timeout=300) as client:
-        resp = await client.post(
-            f"{url}/run", json={"code": code, "database": database}
-        )
-        resp.raise_for_status()
+    with timed("code_interpreter"):
+        async with httpx.AsyncClient(timeout=300) as client:
+            resp = await client.post(
+                f"{url}/run", json={"code": code, "database": database}
+            )
+            resp.raise_for_status()
 
         response = resp.json()
         print(response)
-        return response
+        return await asyncio.to_thread(
+            offload, "code_interpreter", response, config["configurable"]["thread_id"]
+        )
+
+
+def retrieve_schema(query: str) -> str:
+    vectorstore = get_or_create_vector_store()
+    retriever = vectorstore.as_retriever(search_kwargs={"k": 3})
+
+    return create_retriever_tool(
+        retriever,
+        "",
+        "",
+    ).invoke({"query": query})
 
 
 @tool
-def schema_retriever(query: str) -> str:
+def schema_retriever(query: str, config: RunnableConfig) -> str:
     """Search a vector database with snowflake database schema to find tables and columns for SQL query generation.
 
     Args:
@@ -76,14 +103,10 @@ def schema_retriever(query: str) -> str:
     Returns: Table structures with column names, data types, sample values, and
     usage guidance to help write accurate SQL queries for hotel business analysis.
     """
-    vectorstore = get_or_create_vector_store()
-    retriever = vectorstore.as_retriever(search_kwargs={"k": 3})
-
-    return create_retriever_tool(
-        retriever,
-        "",
-        "",
-    ).invoke({"query": query})
+    if prefetch := config.get("configurable", {}).get("schema_prefetch"):
+        prefetch.followups += 1
+    with timed("schema_retriever"):
+        return retrieve_schema(query)
 
 
 @tool
@@ -93,14 +116,97 @@ def sql_executor(sql: str, config: RunnableConfig):
 
     if database is None:
         raise ValueError("Database not found in config")
-    with get_snowflake_conn() as conn:
-        conn.execute(text(f"USE DATABASE {database};"))
-        result = conn.execute(text(sql))
+    try:
+        with timed("sql_executor"):
+            rows = execute_query(database, sql)
+    except SQLValidationError as e:
+        return f"Query rejected before execution: {e}"
+    return offload("sql_executor", rows, config["configurable"]["thread_id"])
+
+
+@tool
+def read_tool_result(stored_as: str, config: RunnableConfig, offset: int = 0) -> str:
+    """Read the full content of a large tool result that was stored out of line.
+
+    Args:
+        stored_as: The `stored_as` reference from the tool result, e.g. "artifact:3f2a…".
+        offset: Character offset to start reading from, for results longer than one page.
+
+    Returns: One page of the stored result, followed by the next offset if there is more.
+    """
+    return dereference(stored_as, config["configurable"]["thread_id"], offset)
+
+
+@tool
+def hotel_lookup(query: str, config: RunnableConfig) -> str:
+    """Look up names of the user's selected hotels.
+
+    Args:
+        query: Comma-separated HOTEL_IDs and/or name fragments, e.g. "6012, 6044"
+        or "Marriott". Leave empty to list every selected hotel.
+
+    Returns: One "HOTEL_ID name" line per matching selected hotel.
+    """
+    hotels = config.get("configurable", {}).get("selected_hotels", [])
+    matches = lookup_hotels(hotels, query)
+    if not matches:
+        return "No selected hotel matches that query."
+    return "\n".join(f"{hotel['id']} {hotel['name']}" for hotel in matches)
+
+
+@tool
+def kpi_sql(
+    metric: str,
+    start_date: str,
+    end_date: str,
+    config: RunnableConfig,
+    group_by: str = "total",
+    hotel_ids: list[int] | None = None,
+) -> str:
+    """Get ready-made SQL for a standard hotel KPI without building the query yourself.
 
-    return [dict(row) for row in result.mappings().all()]
+    Args:
+        metric: One of "adr", "occupancy", "revpar", "room_revenue", "room_nights".
+        start_date: First business date, YYYY-MM-DD or YYYYMMDD.
+        end_date: Last business date (inclusive), YYYY-MM-DD or YYYYMMDD.
+        group_by: One of "total", "hotel", "day", "month", "market_segment"
+            (market_segment is not available for occupancy or revpar).
+        hotel_ids: HOTEL_IDs to include. Defaults to all selected hotels.
+
+    Returns: The SQL to return as-is, or an explanation if the parameters are invalid.
+    """
+    if hotel_ids is None:
+        hotels = config.get("configurable", {}).get("selected_hotels", [])
+        hotel_ids = [hotel["id"] for hotel in hotels]
+    try:
+        query = kpi_query(metric, start_date, end_date, hotel_ids, group_by)
+    except ValueError as e:
+        return f"No KPI template for these parameters: {e}"
+    return f"```sql\n{query.rendered}\n```"
+
+
+@cache
+def get_web_search() -> TavilySearch:
+    """Creates the Tavily client on first use instead of at import"""
+    return TavilySearch(max_results=5, topic="general", search_depth="basic")
+
+
+@tool
+async def web_search(query: str) -> dict[str, Any]:
+    """Search the web for current information, such as hotel industry benchmarks,
+    market trends, events or news.
+
+    Args:
+        query: What to search for, e.g. "STR average ADR for upscale hotels 2025".
+
+    Returns: The top results with title, URL and content snippet.
+    """
 
+    async def search(text: str) -> dict[str, Any]:
+        with timed("web_search"):
+            return await get_web_search().ainvoke({"query": text})
 
-web_search = TavilySearch(max_results=5, topic="general", search_depth="basic")
+    return await search_cache.get_or_search(query, search)
 
 
 def get_tools(selected_tools: list[str]) -> list[Callable[..., Any]]:
@@ -117,13 +223,19 @@ def get_tools(selected_tools: list[str]) -> list[Callable[..., Any]]:
                 tools.append(sql_executor)
             case "web_search":
                 tools.append(web_search)
+            case "hotel_lookup":
+                tools.append(hotel_lookup)
+            case "kpi_sql":
+                tools.append(kpi_sql)
+            case "read_tool_result":
+                tools.append(read_tool_result)
     return tools
 
 
-def load_chat_model(model_provider: str) -> BaseChatModel:
+def load_chat_model(model_provider: str, **kwargs: Any) -> BaseChatModel:
     try:
         provider, model = model_provider.split("/", maxsplit=1)
-        return init_chat_model(model, model_provider=provider)
+        return init_chat_model(model, model_provider=provider, **kwargs)
     except ValueError as ve:
         raise ValueError(
             f"Expected model_provider in format 'provider/model', got: '{model_provider}'"
@@ -1,6 +1,6 @@
 from enum import Enum
 from pydantic_settings import BaseSettings
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,11 +10,42 @@ class Settings(BaseSettings):
     app_name: str = "Default App"
     app_version: str = "0.1.0"
     interpreter_url: str = "Unkown"
+    hotel_cache_ttl: int = 300  # seconds a cached hotel list is served
+    hotel_cache_size: int = 1000  # organizations kept in the hotel list cache
+    web_search_cache_ttl: int = 6 * 3600  # seconds a web search result is reused
+    web_search_cache_size: int = 2000  # normalized queries kept in memory
+    web_search_cache_path: str = ""  # SQLite file that keeps results across restarts
+    admission_global_limit: int = 20  # chat graphs running at once
+    admission_org_limit: int = 5  # chat graphs running at once per organization
+    admission_max_queue: int = 200
+    admission_org_max_queue: int = 25
+    admission_queue_timeout: float = 60  # seconds a stream may wait for a slot
+    admission_retry_after: int = 30  # Retry-After seconds sent when rejected
+    sql_validation: str = "enforce"  # off | warn | enforce
+    run_event_log_size: int = 500  # events kept per run for Last-Event-ID replay
+    run_disconnect_grace: float = 120  # seconds a run keeps going with no client
+    run_retention: float = 300  # seconds a finished run stays available for replay
+    schema_prefetch: bool = True  # retrieve schema on the raw message during routing
+    schema_prefetch_wait: float = 2  # seconds the SQL agent waits for the prefetch
+    run_workers: int = 20  # worker tasks; raised to ADMISSION_GLOBAL_LIMIT if lower
+    run_store_path: str = "app/database/runs.sqlite3"
+    run_store_retention: float = 86400  # seconds finished run records are kept
+    thread_conflict: str = "queue"  # queue | reject a new message on a busy thread
+    thread_queue_limit: int = 3  # runs that may wait behind a thread's active run
+    usage_store_path: str = "app/database/usage.sqlite3"
+    usage_store_retention: float = 90 * 86400  # seconds per-turn usage is kept
+    tool_result_inline_chars: int = 4000  # larger tool results are stored out of line
+    artifact_store_path: str = "app/database/artifacts.sqlite3"
+    artifact_retention: float = 30 * 86400  # seconds since a stored result was last used
 
 
 settings = Settings()
 
 
+# connections per workload; queries beyond this wait for a free one
+WAREHOUSE_CONCURRENCY = {"metadata": 4, "validation": 4, "analysis": 8, "export": 2}
+
+
 class DatabaseSettings(BaseSettings):
     orchestrator_database: str = "unknown"
     snowflake_private_key: str = "unknown"
@@ -22,11 +53,46 @@ class DatabaseSettings(BaseSettings):
     warehouse: str = "unknown"
     account: str = "unknown"
     snowflake_user: str = "unknown"
+    # workload (metadata, validation, analysis, export) -> warehouse; others use WAREHOUSE
+    warehouses: dict[str, str] = {}
+    warehouse_credits_per_hour: dict[str, float] = {}  # by warehouse; 1 when absent
+    # WAREHOUSE_CONCURRENCY overrides the workloads it names, e.g. {"analysis": 12}
+    warehouse_concurrency: dict[str, int] = WAREHOUSE_CONCURRENCY
+    warehouse_queue_timeout: float = 30  # seconds a query waits for a connection
+    validation_row_limit: int = 1000  # LIMIT at or below this marks a validation query
+    # seconds before a connection is replaced (-1: never); Snowflake drops sessions
+    # idle for 4h
+    pool_recycle: int = 3600
+    pool_ping_idle: float = 600  # idle seconds before the health check pings a connection
+    pool_health_interval: float = 60  # seconds between background pool health checks
+
+    @field_validator("warehouse_concurrency")
+    @classmethod
+    def merge_concurrency(cls, value: dict[str, int]) -> dict[str, int]:
+        return {**WAREHOUSE_CONCURRENCY, **value}
 
 
 db_settings = DatabaseSettings()
 
 
+class ReplicaSettings(BaseSettings):
+    replica_enabled: bool = False
+    replica_dir: str = "app/database/replica"
+    # view -> incremental date column (None reloads the whole view on refresh)
+    replica_views: dict[str, str | None] = {
+        "DM_BI.VW_HOTEL": None,
+        "DM_BI.VW_ISP_PMS_BOB": "BUSINESS_DATE",
+    }
+    replica_window_days: int = 120  # days before today kept for incremental views
+    replica_mutable_days: int = 1  # rows from this many days ago onward are re-pulled
+    replica_refresh_seconds: int = 900
+    # replicated at startup; other org databases (from get_database) on first query
+    replica_databases: list[str] = []
+
+
+replica_settings = ReplicaSettings()
+
+
 class VectorStoreConfig(BaseModel):
     collection_name: str = "snowflake_schema"
     embedding_model: str = "text-embedding-3-small"
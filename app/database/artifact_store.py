@@ -0,0 +1,99 @@
+"""
+Content-addressed SQLite store for large tool results, so checkpointed thread
+state keeps a short reference instead of the payload. Payloads are compressed
+and keyed by their SHA-256, so identical results are stored once, and each
+artifact records the threads that stored it: only those can read it back.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+
+from app.config import settings
+
+
+class ArtifactStore:
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._purged_at = 0.0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS artifacts (
+                    digest TEXT PRIMARY KEY,
+                    content BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    used_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS artifact_owners (
+                    thread_id TEXT NOT NULL,
+                    digest TEXT NOT NULL,
+                    PRIMARY KEY (thread_id, digest)
+                );
+                """
+            )
+        return self._conn
+
+    def put(self, content: str, thread_id: str) -> str:
+        """Stores `content` for the thread and returns its digest"""
+        digest = hashlib.sha256(content.encode()).hexdigest()
+        now = time.time()
+        with self._lock, self._connection() as conn:
+            conn.execute(
+                "INSERT INTO artifacts VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (digest) DO UPDATE SET used_at = excluded.used_at",
+                (digest, zlib.compress(content.encode()), len(content), now),
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO artifact_owners VALUES (?, ?)",
+                (thread_id, digest),
+            )
+            if now - self._purged_at > 3600:
+                conn.execute(
+                    "DELETE FROM artifacts WHERE used_at < ?",
+                    (now - settings.artifact_retention,),
+                )
+                conn.execute(
+                    "DELETE FROM artifact_owners"
+                    " WHERE digest NOT IN (SELECT digest FROM artifacts)"
+                )
+                self._purged_at = now
+        return digest
+
+    def get(self, digest: str, thread_id: str) -> str | None:
+        """The content stored under `digest`, if the thread stored it"""
+        with self._lock, self._connection() as conn:
+            row = conn.execute(
+                "SELECT content FROM artifacts JOIN artifact_owners USING (digest)"
+                " WHERE digest = ? AND thread_id = ?",
+                (digest, thread_id),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE artifacts SET used_at = ? WHERE digest = ?",
+                (time.time(), digest),
+            )
+        return zlib.decompress(row[0]).decode()
+
+    def size(self) -> tuple[int, int]:
+        """Number of stored artifacts and their total uncompressed size"""
+        with self._lock:
+            count, size = (
+                self._connection()
+                .execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM artifacts")
+                .fetchone()
+            )
+        return count, size
+
+
+artifact_store = ArtifactStore(settings.artifact_store_path)
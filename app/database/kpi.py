@@ -0,0 +1,207 @@
+"""
+Deterministic SQL templates for the standard hotel KPIs (ADR, occupancy, RevPAR,
+room revenue and room nights), so the common questions skip the schema lookups
+and trial queries of free-form SQL generation.
+
+Templates are compiled once per metric and grouping, checked against the schema
+models and cached; the bind parameters (date range, hotel IDs) are rendered per
+request and the result is cached by the full parameter set.
+"""
+
+import re
+from dataclasses import dataclass
+from datetime import date, datetime
+from functools import lru_cache
+
+from app.database.sql_validator import load_schema_models
+
+SOLD = ("DM_BI", "VW_ISP_PMS_BOB")
+CAPACITY = ("DM_BI", "VW_ISP_PMS_INVENTORY")
+HOTEL = ("DM_BI", "VW_HOTEL")
+
+# metric -> (output expression over sold s / capacity c, needs capacity)
+METRICS: dict[str, tuple[str, bool]] = {
+    "room_revenue": ("s.ROOM_REVENUE", False),
+    "room_nights": ("s.ROOM_NIGHTS", False),
+    "adr": ("s.ROOM_REVENUE / NULLIF(s.ROOM_NIGHTS, 0)", False),
+    "occupancy": ("COALESCE(s.ROOM_NIGHTS, 0) / NULLIF(c.ROOMS_AVAILABLE, 0)", True),
+    "revpar": ("COALESCE(s.ROOM_REVENUE, 0) / NULLIF(c.ROOMS_AVAILABLE, 0)", True),
+}
+
+# grouping -> (output column, expression over a source aliased {t}, sold-only)
+GROUPINGS: dict[str, tuple[str, str, bool] | None] = {
+    "total": None,
+    "hotel": ("HOTEL_ID", "{t}.HOTEL_ID", False),
+    "day": ("BUSINESS_DATE", "{t}.BUSINESS_DATE", False),
+    "month": ("BUSINESS_MONTH", "FLOOR({t}.BUSINESS_DATE / 100)", False),
+    "market_segment": ("MARKET_SEGMENT", "{t}.PMS_MARKET_SEGMENT", True),
+}
+
+COLUMNS = {
+    SOLD: {
+        "HOTEL_ID",
+        "BUSINESS_DATE",
+        "ROOMS",
+        "ROOM_REVENUE",
+        "PMS_RES_STATUS",
+        "PMS_MARKET_SEGMENT",
+    },
+    CAPACITY: {
+        "HOTEL_ID",
+        "BUSINESS_DATE",
+        "PAST_INVENTORY",
+        "FUTURE_INVENTORY",
+        "OUT_OF_ORDER",
+    },
+    HOTEL: {"ID", "NAME"},
+}
+
+BIND = re.compile(r":(\w+)")
+
+
+@dataclass(frozen=True)
+class KpiQuery:
+    sql: str  # with :start_date, :end_date and :hotel_ids bind parameters
+    params: dict[str, int | tuple[int, ...]]
+    rendered: str  # parameters inlined, ready for execute_sql
+
+
+def check_schema() -> None:
+    """Raises ValueError if the views or columns the templates use left the models"""
+    models = load_schema_models()
+    for (schema, table), columns in COLUMNS.items():
+        missing = columns - models.get(schema, {}).get(table, frozenset())
+        if missing:
+            raise ValueError(
+                f"KPI templates need {schema}.{table} columns missing from the "
+                f"schema models: {', '.join(sorted(missing))}"
+            )
+
+
+def to_yyyymmdd(value: str | int | date) -> int:
+    if isinstance(value, date):
+        return int(value.strftime("%Y%m%d"))
+    text = str(value).strip()
+    for fmt in ("%Y%m%d", "%Y-%m-%d"):
+        try:
+            return int(datetime.strptime(text, fmt).strftime("%Y%m%d"))
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid date '{value}'. Use YYYY-MM-DD or YYYYMMDD.")
+
+
+def _aggregate(
+    table: tuple[str, str], alias: str, measures: str, key: str | None, where: str
+) -> str:
+    select = f"{key} AS GROUP_KEY, {measures}" if key else measures
+    group = f"\n    GROUP BY {key}" if key else ""
+    return (
+        f"SELECT {select}\n    FROM {table[0]}.{table[1]} AS {alias}"
+        f"\n    WHERE {where}{group}"
+    )
+
+
+@lru_cache(maxsize=64)
+def compile_template(metric: str, group_by: str) -> str:
+    """Builds the bind-parameterized SQL for one metric and grouping"""
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric '{metric}'. Use one of: {', '.join(METRICS)}.")
+    if group_by not in GROUPINGS:
+        raise ValueError(
+            f"Unknown grouping '{group_by}'. Use one of: {', '.join(GROUPINGS)}."
+        )
+    check_schema()
+    expression, needs_capacity = METRICS[metric]
+    grouping = GROUPINGS[group_by]
+    if grouping and grouping[2] and needs_capacity:
+        raise ValueError(f"{metric} cannot be grouped by {group_by}.")
+    column, key = (grouping[0], grouping[1]) if grouping else (None, None)
+
+    sold = _aggregate(
+        SOLD,
+        "b",
+        "SUM(b.ROOMS) AS ROOM_NIGHTS, SUM(b.ROOM_REVENUE) AS ROOM_REVENUE",
+        key and key.format(t="b"),
+        "b.HOTEL_ID IN :hotel_ids"
+        " AND b.BUSINESS_DATE BETWEEN :start_date AND :end_date"
+        " AND COALESCE(LOWER(b.PMS_RES_STATUS), '') <> 'cancelled'",
+    )
+    ctes = [f"sold AS (\n    {sold}\n)"]
+    driver, outputs = "s", ["s.ROOM_NIGHTS", "s.ROOM_REVENUE"]
+    joins = []
+    if needs_capacity:
+        capacity = _aggregate(
+            CAPACITY,
+            "i",
+            "SUM(COALESCE(i.PAST_INVENTORY, i.FUTURE_INVENTORY, 0)"
+            " - COALESCE(i.OUT_OF_ORDER, 0)) AS ROOMS_AVAILABLE",
+            key and key.format(t="i"),
+            "i.HOTEL_ID IN :hotel_ids"
+            " AND i.BUSINESS_DATE BETWEEN :start_date AND :end_date",
+        )
+        ctes.append(f"capacity AS (\n    {capacity}\n)")
+        driver = "c"
+        outputs.append("c.ROOMS_AVAILABLE")
+        joins.append(
+            "LEFT JOIN sold AS s ON s.GROUP_KEY = c.GROUP_KEY"
+            if key
+            else "CROSS JOIN sold AS s"
+        )
+
+    select = [f"{expression} AS {metric.upper()}", *outputs]
+    order = ""
+    if column:
+        select.insert(0, f"{driver}.GROUP_KEY AS {column}")
+        order = f"\nORDER BY {driver}.GROUP_KEY"
+    if group_by == "hotel":
+        select.insert(1, "h.NAME AS HOTEL_NAME")
+        joins.append(f"JOIN {HOTEL[0]}.{HOTEL[1]} AS h ON h.ID = {driver}.GROUP_KEY")
+
+    source = "capacity AS c" if needs_capacity else "sold AS s"
+    scope = f" by {group_by}" if column else ""
+    lines = [
+        f"-- {metric.upper()}{scope} for the selected hotels",
+        "WITH " + ",\n".join(ctes),
+        "SELECT " + ", ".join(select),
+        f"FROM {source}",
+        *joins,
+    ]
+    return "\n".join(lines) + order
+
+
+def render(sql: str, params: dict[str, int | tuple[int, ...]]) -> str:
+    """Inlines the (integer-only) bind parameters"""
+
+    def literal(match: re.Match) -> str:
+        value = params[match.group(1)]
+        if isinstance(value, tuple):
+            return f"({', '.join(str(int(v)) for v in value)})"
+        return str(int(value))
+
+    return BIND.sub(literal, sql)
+
+
+@lru_cache(maxsize=1024)
+def _kpi_query(
+    metric: str, start: int, end: int, hotel_ids: tuple[int, ...], group_by: str
+) -> KpiQuery:
+    sql = compile_template(metric, group_by)
+    params = {"start_date": start, "end_date": end, "hotel_ids": hotel_ids}
+    return KpiQuery(sql=sql, params=params, rendered=render(sql, params))
+
+
+def kpi_query(
+    metric: str,
+    start_date: str | int | date,
+    end_date: str | int | date,
+    hotel_ids: list[int],
+    group_by: str = "total",
+) -> KpiQuery:
+    """Returns the SQL for a KPI over a date range and hotel set, cached by parameters"""
+    start, end = to_yyyymmdd(start_date), to_yyyymmdd(end_date)
+    if start > end:
+        raise ValueError("The start date must not be after the end date.")
+    if not hotel_ids:
+        raise ValueError("At least one HOTEL_ID is required.")
+    ids = tuple(sorted({int(hotel_id) for hotel_id in hotel_ids}))
+    return _kpi_query(metric.lower(), start, end, ids, group_by.lower())
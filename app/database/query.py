@@ -0,0 +1,77 @@
+import logging
+import re
+import time
+from typing import Any
+
+from sqlalchemy.sql import text
+
+from app.config import db_settings, settings
+from app.database.replica import replica
+from app.database.snowflake import run_on_connection, warehouse_for
+from app.database.sql_validator import check_sql
+from app.metrics import query_seconds, warehouse_query_seconds
+from app.schemas.error import SQLValidationError
+from app.usage import current_turn
+
+logger = logging.getLogger(__name__)
+
+METADATA = re.compile(
+    r"^\s*(SHOW|DESCRIBE|DESC)\b|\bINFORMATION_SCHEMA\.|\bMETA\.", re.I
+)
+TRAILING_LIMIT = re.compile(r"\bLIMIT\s+(\d+)\s*;?\s*$", re.I)
+COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+
+
+def classify(sql: str) -> str:
+    """Picks the workload of an agent's statement: metadata lookups, small LIMIT
+    queries (validation) or analysis"""
+    statement = COMMENTS.sub(" ", sql).strip()
+    if METADATA.search(statement):
+        return "metadata"
+    limit = TRAILING_LIMIT.search(statement)
+    if limit and int(limit.group(1)) <= db_settings.validation_row_limit:
+        return "validation"
+    return "analysis"
+
+
+def execute_query(
+    database: str, sql: str, workload: str | None = None
+) -> list[dict[str, Any]]:
+    """Runs a query on the local replica when it can answer it, otherwise on Snowflake.
+
+    Queries referencing unknown schemas, tables or columns raise SQLValidationError
+    without reaching the warehouse when SQL_VALIDATION is "enforce". Snowflake
+    queries run on the warehouse and connection pool of `workload`; without one
+    (agent SQL) it is classified from the statement.
+    """
+    if settings.sql_validation != "off":
+        errors = check_sql(sql)
+        if errors and settings.sql_validation == "enforce":
+            raise SQLValidationError(errors)
+
+    if replica.enabled:
+        replica.track(database)
+        if (local_sql := replica.local_sql(database, sql)) is not None:
+            try:
+                with query_seconds.labels("replica").time():
+                    return replica.query(database, local_sql)
+            except Exception as e:
+                logger.warning("Replica query failed, using Snowflake: %s", str(e))
+
+    workload = workload or classify(sql)
+    warehouse = warehouse_for(workload)
+
+    def run(conn) -> list[dict[str, Any]]:
+        result = conn.execute(text(sql))
+        return [dict(row) for row in result.mappings().all()]
+
+    start = time.perf_counter()
+    try:
+        with (
+            query_seconds.labels("snowflake").time(),
+            warehouse_query_seconds.labels(workload, warehouse).time(),
+        ):
+            return run_on_connection(workload, run, database=database)
+    finally:
+        if turn := current_turn():
+            turn.record_query(warehouse, time.perf_counter() - start)
@@ -0,0 +1,262 @@
+"""
+Optional local DuckDB replica of hot Snowflake views, one file per org database.
+
+Enabled with REPLICA_ENABLED=true and the `replica` extra (duckdb, pandas).
+"""
+
+import asyncio
+import logging
+import re
+import threading
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy.sql import text
+
+from app.config import replica_settings as rs
+from app.database.snowflake import get_snowflake_conn, resolved_databases
+from app.metrics import replica_refresh_seconds
+
+try:
+    import duckdb
+    import pandas as pd
+except ImportError:  # optional dependency
+    duckdb = None
+    pd = None
+
+try:
+    import sqlglot
+    from sqlglot import exp
+    from sqlglot.errors import SqlglotError
+except ImportError:  # optional dependency
+    sqlglot = None
+
+logger = logging.getLogger(__name__)
+
+FETCH_BATCH = 50_000
+IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_$]*")
+
+
+def yyyymmdd(day: date) -> int:
+    return int(day.strftime("%Y%m%d"))
+
+
+def _conjuncts(condition):
+    """The conditions AND-ed at the top level of a WHERE clause"""
+    if isinstance(condition, exp.Paren):
+        yield from _conjuncts(condition.this)
+    elif isinstance(condition, exp.And):
+        yield from _conjuncts(condition.left)
+        yield from _conjuncts(condition.right)
+    else:
+        yield condition
+
+
+def _date_value(node) -> int | None:
+    if isinstance(node, exp.Literal) and node.this.isdigit() and len(node.this) == 8:
+        return int(node.this)
+    return None
+
+
+def _lower_bound(condition, matches) -> int | None:
+    """The smallest date `condition` admits for a column accepted by `matches`, or
+    None if it does not bound the column from below"""
+    if isinstance(condition, exp.Between) and matches(condition.this):
+        return _date_value(condition.args.get("low"))
+    if isinstance(condition, exp.In) and matches(condition.this):
+        values = [_date_value(value) for value in condition.expressions]
+        return None if not values or None in values else min(values)
+    if isinstance(condition, (exp.GTE, exp.GT, exp.EQ)) and matches(condition.this):
+        return _date_value(condition.expression)
+    if isinstance(condition, (exp.LTE, exp.LT, exp.EQ)) and matches(
+        condition.expression
+    ):
+        return _date_value(condition.this)
+    return None
+
+
+class LocalReplica:
+    """Keeps configured views in DuckDB and answers eligible SELECTs locally."""
+
+    def __init__(self):
+        self.dir = Path(rs.replica_dir)
+        self.views = {view.upper(): column for view, column in rs.replica_views.items()}
+        self._connections: dict[str, Any] = {}
+        self._refreshed: dict[str, int] = {}  # database -> window start (YYYYMMDD)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return rs.replica_enabled and duckdb is not None
+
+    def _connection(self, database: str):
+        with self._lock:
+            if self._connections.get(database) is None:
+                self.dir.mkdir(parents=True, exist_ok=True)
+                self._connections[database] = duckdb.connect(
+                    str(self.dir / f"{database}.duckdb")
+                )
+            return self._connections[database]
+
+    def track(self, database: str) -> None:
+        """Registers a database so the refresh loop starts replicating it. Only
+        REPLICA_DATABASES and org databases resolved by get_database qualify, and
+        the name must be a plain identifier since it also names the DuckDB file."""
+        if not IDENTIFIER.fullmatch(database) or (
+            database not in rs.replica_databases
+            and database not in resolved_databases
+        ):
+            return
+        with self._lock:
+            self._connections.setdefault(database, None)
+
+    def _refresh_view(self, database: str, view: str, column: str | None) -> None:
+        schema, table = view.split(".")
+        cursor = self._connection(database).cursor()
+        cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {schema}")
+        exists = cursor.execute(
+            "SELECT COUNT(*) FROM information_schema.tables "
+            "WHERE table_schema = ? AND table_name = ?",
+            [schema, table],
+        ).fetchone()[0]
+
+        query = f"SELECT * FROM {view}"
+        params: dict[str, int] = {}
+        if column is not None:
+            window_start = yyyymmdd(
+                date.today() - timedelta(days=rs.replica_window_days)
+            )
+            since = window_start
+            if exists:
+                mutable_from = yyyymmdd(
+                    date.today() - timedelta(days=rs.replica_mutable_days)
+                )
+                local_max = cursor.execute(
+                    f"SELECT MAX({column}) FROM {view}"
+                ).fetchone()[0]
+                if local_max is not None:
+                    since = max(window_start, min(int(local_max) + 1, mutable_from))
+            query += f" WHERE {column} >= :since"
+            params["since"] = since
+
+        with get_snowflake_conn("export") as conn:
+            conn.execute(text(f"USE DATABASE {database};"))
+            result = conn.execute(text(query), params)
+            columns = list(result.keys())
+
+            cursor.execute("BEGIN TRANSACTION")
+            try:
+                if exists and column is None:
+                    cursor.execute(f"DELETE FROM {view}")
+                elif exists:
+                    cursor.execute(
+                        f"DELETE FROM {view} WHERE {column} >= ? OR {column} < ?",
+                        [params["since"], window_start],
+                    )
+                while rows := result.fetchmany(FETCH_BATCH):
+                    batch = pd.DataFrame.from_records(rows, columns=columns)
+                    cursor.register("batch", batch)
+                    if not exists:
+                        cursor.execute(f"CREATE TABLE {view} AS SELECT * FROM batch")
+                        exists = True
+                    else:
+                        cursor.execute(f"INSERT INTO {view} SELECT * FROM batch")
+                    cursor.unregister("batch")
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+
+    def refresh(self, database: str) -> None:
+        """Pulls new and changed rows of every configured view from Snowflake"""
+        for view, column in self.views.items():
+            with replica_refresh_seconds.labels(view).time():
+                self._refresh_view(database, view, column)
+        self._refreshed[database] = yyyymmdd(
+            date.today() - timedelta(days=rs.replica_window_days)
+        )
+        logger.info("Refreshed local replica of %s", database)
+
+    async def refresh_loop(self) -> None:
+        for database in rs.replica_databases:
+            self.track(database)
+        while True:
+            for database in list(self._connections):
+                try:
+                    await asyncio.to_thread(self.refresh, database)
+                except Exception as e:
+                    logger.error("Replica refresh failed for %s: %s", database, str(e))
+            await asyncio.sleep(rs.replica_refresh_seconds)
+
+    def local_sql(self, database: str, sql: str) -> str | None:
+        """The query in DuckDB's dialect when the replica can answer it: every table
+        it reads is replicated and, in every SELECT reading a windowed view, the
+        WHERE clause AND-s in a lower bound on its date column inside the replicated
+        window. None otherwise."""
+        if database not in self._refreshed or sqlglot is None:
+            return None
+        try:
+            statements = sqlglot.parse(sql, read="snowflake")
+        except SqlglotError:
+            return None
+        if len(statements) != 1 or not isinstance(statements[0], exp.Query):
+            return None
+        statement = statements[0]
+
+        ctes = {cte.alias.upper() for cte in statement.find_all(exp.CTE)}
+        tables = [
+            table
+            for table in statement.find_all(exp.Table)
+            if table.name.upper() not in ctes or table.db
+        ]
+        names = {f"{table.db}.{table.name}".upper() for table in tables}
+        if not names or not names <= self.views.keys():
+            return None
+
+        window_start = self._refreshed[database]
+        for select in statement.find_all(exp.Select):
+            # the FROM clause is "from_" since sqlglot 28, "from" before
+            clause = select.args.get("from_") or select.args.get("from")
+            sources = [
+                source.this
+                for source in [clause, *select.args.get("joins", [])]
+                if source is not None
+            ]
+            for table in sources:
+                if not isinstance(table, exp.Table):
+                    continue  # subqueries are checked as SELECTs of their own
+                column = self.views.get(f"{table.db}.{table.name}".upper())
+                if column is None:
+                    continue
+
+                def matches(node, table=table, column=column) -> bool:
+                    return (
+                        isinstance(node, exp.Column)
+                        and node.name.upper() == column.upper()
+                        and node.table.upper()
+                        in ("", table.alias_or_name.upper(), table.name.upper())
+                    )
+
+                where = select.args.get("where")
+                bounds = [
+                    _lower_bound(condition, matches)
+                    for condition in (_conjuncts(where.this) if where else ())
+                ]
+                if not any(b is not None and b >= window_start for b in bounds):
+                    return None
+        try:
+            return statement.sql(dialect="duckdb")
+        except SqlglotError:
+            return None
+
+    def query(self, database: str, sql: str) -> list[dict[str, Any]]:
+        """Runs DuckDB SQL (from `local_sql`) against the replica; column names are
+        lower-cased like Snowflake's"""
+        cursor = self._connection(database).cursor()
+        result = cursor.execute(sql)
+        columns = [d[0].lower() for d in result.description]
+        return [dict(zip(columns, row)) for row in result.fetchall()]
+
+
+replica = LocalReplica()
@@ -0,0 +1,99 @@
+"""
+Small SQLite store of background run records, so runs that were queued or running
+when a worker stopped can be picked up again after a restart.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from app.config import settings
+
+UNFINISHED = ("queued", "running")
+
+
+class RunStore:
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS runs (
+                    id TEXT PRIMARY KEY,
+                    thread_id TEXT NOT NULL,
+                    database TEXT NOT NULL,
+                    priority INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    request TEXT NOT NULL,
+                    result TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+        return self._conn
+
+    def save(
+        self,
+        run_id: str,
+        thread_id: str,
+        database: str,
+        priority: int,
+        request: dict[str, Any],
+    ) -> None:
+        now = time.time()
+        with self._lock, self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, 'queued', ?, NULL, ?, ?)",
+                (run_id, thread_id, database, priority, json.dumps(request), now, now),
+            )
+
+    def update(self, run_id: str, status: str, result: str | None = None) -> None:
+        with self._lock, self._connection() as conn:
+            conn.execute(
+                "UPDATE runs SET status = ?, result = COALESCE(?, result), updated_at = ?"
+                " WHERE id = ?",
+                (status, result, time.time(), run_id),
+            )
+
+    def get(self, run_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            row = (
+                self._connection()
+                .execute("SELECT * FROM runs WHERE id = ?", (run_id,))
+                .fetchone()
+            )
+        return dict(row) if row else None
+
+    def unfinished(self) -> list[dict[str, Any]]:
+        """Runs left queued or running by a previous process, oldest first"""
+        with self._lock:
+            rows = (
+                self._connection()
+                .execute(
+                    "SELECT * FROM runs WHERE status IN (?, ?) ORDER BY created_at",
+                    UNFINISHED,
+                )
+                .fetchall()
+            )
+        return [dict(row) for row in rows]
+
+    def purge(self, older_than: float) -> None:
+        with self._lock, self._connection() as conn:
+            conn.execute(
+                "DELETE FROM runs WHERE status NOT IN (?, ?) AND updated_at < ?",
+                (*UNFINISHED, older_than),
+            )
+
+
+run_store = RunStore(settings.run_store_path)
@@ -1,14 +1,41 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Callable, TypeVar, cast
+
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.backends import default_backend
 from snowflake.sqlalchemy import URL
-from sqlalchemy import create_engine
+from sqlalchemy import Connection, Engine, create_engine, event
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.sql import text
 import sqlalchemy.pool as pool
 from app.config import db_settings
+from app.metrics import (
+    db_checkout_seconds,
+    db_pool_connections,
+    db_pool_maintenance,
+    timed,
+)
 from app.schemas.error import DatabaseNotFoundError
 
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+WORKLOADS = ("metadata", "validation", "analysis", "export")
+
+# connector errors meaning the session or connection is gone: could not connect,
+# connection closed, session no longer exists, session expired, token expired
+DISCONNECT_ERRNOS = {250001, 250002, 390111, 390112, 390114}
+
 
-def create_snowflake_engine():
+def warehouse_for(workload: str) -> str:
+    return db_settings.warehouses.get(workload, db_settings.warehouse)
+
+
+def create_snowflake_engine(workload: str = "analysis"):
     private_key_str = db_settings.snowflake_private_key
     snowflake_pass = db_settings.snowflake_pass or None
 
@@ -28,30 +55,217 @@ def create_snowflake_engine():
         URL(
             account=db_settings.account,
             user=db_settings.snowflake_user,
-            warehouse=db_settings.warehouse,
+            warehouse=warehouse_for(workload),
         ),
         connect_args={"authenticator": "SNOWFLAKE_JWT", "private_key": pkb},
         poolclass=pool.QueuePool,
-        pool_size=5,
-        max_overflow=10,
-        pool_pre_ping=True,
+        # the pool size is the workload's concurrency limit; callers beyond it wait
+        # up to pool_timeout for a connection instead of opening more
+        pool_size=db_settings.warehouse_concurrency.get(workload, 5),
+        max_overflow=0,
+        pool_timeout=db_settings.warehouse_queue_timeout,
+        # no pre-ping round trip per checkout: liveness is checked in the background
+        # by check_pools, and the most recently used (known live) connection is
+        # handed out first
+        pool_recycle=db_settings.pool_recycle,
+        pool_use_lifo=True,
     )
 
 
-engine = create_snowflake_engine()
+def _instrument(engine: Engine) -> None:
+    """Tracks connection age and idle time and marks lost sessions as disconnects,
+    so SQLAlchemy invalidates the connection instead of returning it to the pool"""
+
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection, record):
+        record.info["connected_at"] = record.info["used_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkin")
+    def checkin(dbapi_connection, record):
+        # a connection the health check only looked at keeps its idle time
+        if not record.info.pop("untouched", False):
+            record.info["used_at"] = time.monotonic()
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        if getattr(context.original_exception, "errno", None) in DISCONNECT_ERRNOS:
+            context.is_disconnect = True
+
+
+_engines: dict[str, Engine] = {}
+_engine_lock = threading.Lock()
+
+
+def get_engine(workload: str = "analysis") -> Engine:
+    """Creates the workload's engine on first use so importing the app does not
+    parse the key. Each workload has its own pool on its own warehouse."""
+    if workload not in WORKLOADS:
+        raise ValueError(f"Unknown workload '{workload}'")
+    engine = _engines.get(workload)
+    if engine is None:
+        with _engine_lock:
+            engine = _engines.get(workload)
+            if engine is None:
+                engine = create_snowflake_engine(workload)
+                _instrument(engine)
+                queue_pool = cast(pool.QueuePool, engine.pool)
+                for state, usage in {
+                    "checked_out": queue_pool.checkedout,
+                    "checked_in": queue_pool.checkedin,
+                    "overflow": queue_pool.overflow,
+                }.items():
+                    db_pool_connections.labels(workload, state).set_function(usage)
+                _engines[workload] = engine
+    return engine
+
+
+def get_snowflake_conn(workload: str = "analysis") -> Connection:
+    start = time.perf_counter()
+    conn = get_engine(workload).connect()
+    db_checkout_seconds.labels(workload).observe(time.perf_counter() - start)
+    return conn
+
+
+def run_on_connection(
+    workload: str,
+    work: Callable[[Connection], T],
+    database: str | None = None,
+    read_only: bool = False,
+) -> T:
+    """Runs `work` on a pooled connection of the workload, after `USE DATABASE` when
+    `database` is given.
 
+    A dead connection is invalidated, and the call is retried once on a fresh one
+    only if it failed before `work` sent anything (on `USE DATABASE`), or if the
+    caller marks `work` as `read_only`. Arbitrary SQL that may already have reached
+    the warehouse is never run twice.
+    """
+    sent = False
+    try:
+        with get_snowflake_conn(workload) as conn:
+            if database:
+                conn.execute(text(f"USE DATABASE {database};"))
+            sent = True
+            return work(conn)
+    except DBAPIError as e:
+        if not e.connection_invalidated or (sent and not read_only):
+            raise
+        logger.warning("Dead %s connection, retrying: %s", workload, e.orig)
+        db_pool_maintenance.labels(workload, "retried").inc()
+    with get_snowflake_conn(workload) as conn:
+        if database:
+            conn.execute(text(f"USE DATABASE {database};"))
+        return work(conn)
 
-def get_snowflake_conn():
-    return engine.connect()
+
+def _ping(connection) -> bool:
+    try:
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        finally:
+            cursor.close()
+        return True
+    except Exception:
+        return False
+
+
+def _maintenance(info: dict, now: float) -> str | None:
+    """What a pooled connection needs: "replace" when it is about to reach
+    POOL_RECYCLE (-1 disables recycling), "ping" when idle for POOL_PING_IDLE"""
+    recycle = db_settings.pool_recycle
+    if recycle >= 0:
+        replace_after = max(recycle - 2 * db_settings.pool_health_interval, recycle / 2)
+        if now - info.get("connected_at", now) > replace_after:
+            return "replace"
+    if now - info.get("used_at", now) > db_settings.pool_ping_idle:
+        return "ping"
+    return None
+
+
+def check_pool(workload: str, engine: Engine) -> None:
+    """Pings the workload's connections that have been idle for POOL_PING_IDLE
+    seconds and replaces dead ones and those about to reach POOL_RECYCLE, so the
+    handshake happens here rather than on a request's checkout.
+
+    Only one connection is held while it is pinged or replaced: the idle ones
+    taken to reach it are returned (in their LIFO order) before any round trip.
+    """
+    queue_pool = cast(pool.QueuePool, engine.pool)
+    now = time.monotonic()
+    for _ in range(queue_pool.size()):
+        passed, target = [], None
+        try:
+            # take only connections that are idle now; requests keep getting the rest
+            while queue_pool.checkedin():
+                connection = queue_pool.connect()
+                if _maintenance(connection.info, now):
+                    target = connection
+                    break
+                passed.append(connection)
+        finally:
+            for connection in reversed(passed):
+                connection.info["untouched"] = True
+                connection.close()
+        if target is None:
+            return
+
+        if _maintenance(target.info, now) == "ping":
+            if _ping(target):
+                db_pool_maintenance.labels(workload, "pinged").inc()
+                target.close()
+                continue
+            db_pool_maintenance.labels(workload, "dead").inc()
+        target.invalidate()
+        target.close()
+        # the invalidated record is now on top of the LIFO pool; reconnect it
+        queue_pool.connect().close()
+        db_pool_maintenance.labels(workload, "replaced").inc()
+
+
+def check_pools() -> None:
+    for workload, engine in list(_engines.items()):
+        try:
+            check_pool(workload, engine)
+        except Exception as e:
+            logger.warning("Health check of the %s pool failed: %s", workload, e)
+
+
+async def health_check_loop() -> None:
+    """Checks the pools every POOL_HEALTH_INTERVAL seconds in a worker thread"""
+    while True:
+        await asyncio.sleep(db_settings.pool_health_interval)
+        await asyncio.to_thread(check_pools)
+
+
+def warm_up_engine() -> None:
+    """Opens one pooled connection per interactive workload so the first requests
+    skip the handshake"""
+    for workload in ("metadata", "validation", "analysis"):
+        run_on_connection(
+            workload, lambda conn: conn.execute(text("SELECT 1")), read_only=True
+        )
+
+
+# org databases returned by get_database, the only ones the replica may track
+resolved_databases: set[str] = set()
 
 
 def get_database(organization_id: int) -> str:
-    with get_snowflake_conn() as conn:
-        conn.execute(text(f"USE DATABASE {db_settings.orchestrator_database};"))
+    def lookup(conn: Connection):
         query = text(
             "SELECT DATAWAREHOUSE_DATABASE_NAME FROM META.TBL_ORGANIZATION_CONFIG WHERE organization_id = :org_id"
         )
-        result = conn.execute(query, {"org_id": organization_id}).fetchone()
-        if not result:
-            raise DatabaseNotFoundError("Organization not found")
+        return conn.execute(query, {"org_id": organization_id}).fetchone()
+
+    with timed("get_database"):
+        result = run_on_connection(
+            "metadata",
+            lookup,
+            database=db_settings.orchestrator_database,
+            read_only=True,
+        )
+    if not result:
+        raise DatabaseNotFoundError("Organization not found")
+    resolved_databases.add(result[0])
     return result[0]
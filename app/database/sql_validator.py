@@ -0,0 +1,157 @@
+"""
+Local static validation of generated SQL against the schema model files, so wrong
+schema, table or column names are caught before a warehouse round trip.
+"""
+
+import difflib
+import json
+import logging
+from functools import cache
+from pathlib import Path
+
+from app.config import vector_store_config as vc
+from app.metrics import sql_prevalidation
+
+try:
+    import sqlglot
+    from sqlglot import exp
+    from sqlglot.errors import SqlglotError
+except ImportError:  # optional dependency
+    sqlglot = None
+
+logger = logging.getLogger(__name__)
+
+# catalog views the schema models don't describe; queries on them are not checked
+SYSTEM_SCHEMAS = frozenset(
+    {"INFORMATION_SCHEMA", "ACCOUNT_USAGE", "ORGANIZATION_USAGE"}
+)
+SYSTEM_DATABASES = frozenset({"SNOWFLAKE"})
+
+
+@cache
+def load_schema_models() -> dict[str, dict[str, frozenset[str]]]:
+    """Returns {SCHEMA: {TABLE: columns}} parsed from the schema model files"""
+    models: dict[str, dict[str, frozenset[str]]] = {}
+    for path in Path(vc.schema_dir).glob("*.json"):
+        for table in json.loads(path.read_text()).values():
+            columns = frozenset(
+                column.split(":", 1)[0].strip().upper() for column in table["columns"]
+            )
+            models.setdefault(table["schema"].upper(), {})[
+                table["table_name"].upper()
+            ] = columns
+    return models
+
+
+def declared_type(column: str) -> tuple[str, str]:
+    """Splits a schema model column entry into its name and a normalized type:
+    "yyyymmdd" for dates stored as YYYYMMDD, otherwise the lowercased type name"""
+    name, _, rest = column.partition(":")
+    kind, _, example = rest.partition("Example:")
+    name, kind, example = name.strip().upper(), kind.strip(" ,"), example.strip()
+    if "YYYYMMDD" in kind.upper() or (
+        name.endswith("DATE") and example.isdigit() and len(example) == 8
+    ):
+        return name, "yyyymmdd"
+    return name, kind.split()[0].lower() if kind else "unknown"
+
+
+@cache
+def load_column_types() -> dict[str, str]:
+    """Returns {COLUMN: type} for column names with one type across all models"""
+    seen: dict[str, set[str]] = {}
+    for path in Path(vc.schema_dir).glob("*.json"):
+        for table in json.loads(path.read_text()).values():
+            for column in table["columns"]:
+                name, kind = declared_type(column)
+                seen.setdefault(name, set()).add(kind)
+    return {name: kinds.pop() for name, kinds in seen.items() if len(kinds) == 1}
+
+
+def suggest(name: str, candidates) -> str:
+    matches = difflib.get_close_matches(name, list(candidates), n=3, cutoff=0.6)
+    return f" Did you mean: {', '.join(matches)}?" if matches else ""
+
+
+def validate_sql(sql: str) -> list[str] | None:
+    """Returns a list of problems, an empty list if the query is valid, or None when
+    the query could not be checked (sqlglot missing or unparseable)"""
+    if sqlglot is None:
+        return None
+    try:
+        statements = [s for s in sqlglot.parse(sql, read="snowflake") if s is not None]
+    except SqlglotError:
+        return None
+
+    models = load_schema_models()
+    errors: list[str] = []
+    for statement in statements:
+        derived = {cte.alias.upper() for cte in statement.find_all(exp.CTE)}
+        derived |= {
+            sub.alias.upper() for sub in statement.find_all(exp.Subquery) if sub.alias
+        }
+        sources: dict[str, frozenset[str]] = {}
+        all_modeled = True
+
+        for table in statement.find_all(exp.Table):
+            name, schema = table.name.upper(), table.db.upper()
+            if not schema:
+                all_modeled &= name in derived
+                continue
+            if schema in SYSTEM_SCHEMAS or table.catalog.upper() in SYSTEM_DATABASES:
+                all_modeled = False
+                continue
+            if schema not in models:
+                errors.append(
+                    f"Unknown schema '{table.db}'. Known schemas: {', '.join(models)}."
+                )
+                all_modeled = False
+                continue
+            if name not in models[schema]:
+                errors.append(
+                    f"Unknown table '{table.db}.{table.name}'."
+                    + suggest(name, models[schema])
+                )
+                all_modeled = False
+                continue
+            sources[name] = models[schema][name]
+            if table.alias:
+                sources[table.alias.upper()] = models[schema][name]
+
+        output_aliases = {a.alias.upper() for a in statement.find_all(exp.Alias)}
+        check_unqualified = all_modeled and not derived and bool(sources)
+        known_columns = frozenset().union(*sources.values())
+
+        for column in statement.find_all(exp.Column):
+            name = column.name.upper()
+            if not name or name == "*":
+                continue
+            qualifier = column.table.upper()
+            if qualifier in sources and name not in sources[qualifier]:
+                errors.append(
+                    f"Unknown column '{column.table}.{column.name}'."
+                    + suggest(name, sources[qualifier])
+                )
+            elif (
+                not qualifier
+                and check_unqualified
+                and name not in known_columns
+                and name not in output_aliases
+            ):
+                errors.append(
+                    f"Unknown column '{column.name}'." + suggest(name, known_columns)
+                )
+
+    return list(dict.fromkeys(errors))
+
+
+def check_sql(sql: str) -> list[str]:
+    """Validates a query and records the outcome; returns the problems found"""
+    errors = validate_sql(sql)
+    if errors is None:
+        sql_prevalidation.labels("skipped").inc()
+        return []
+    sql_prevalidation.labels("rejected" if errors else "valid").inc()
+    if errors:
+        logger.info("Rejected SQL before execution: %s", "; ".join(errors))
+    return errors
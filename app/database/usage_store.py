@@ -0,0 +1,146 @@
+"""
+Small SQLite store of per-turn usage (tokens, cost, tool time, warehouse credits),
+one row per turn and item, so spend can be summed by organization, thread, turn
+or item.
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from app.config import settings
+
+GROUPINGS = {
+    "organization": "organization_id",
+    "thread": "thread_id",
+    "run": "run_id",
+    "item": "kind, name",
+}
+
+
+class UsageStore:
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._purged_at = 0.0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS usage (
+                    run_id TEXT NOT NULL,
+                    thread_id TEXT NOT NULL,
+                    organization_id INTEGER NOT NULL,
+                    database TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    calls INTEGER NOT NULL,
+                    input_tokens INTEGER NOT NULL,
+                    cached_tokens INTEGER NOT NULL,
+                    output_tokens INTEGER NOT NULL,
+                    seconds REAL NOT NULL,
+                    cost_usd REAL NOT NULL,
+                    credits REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (run_id, kind, name)
+                );
+                CREATE INDEX IF NOT EXISTS usage_org ON usage (organization_id, created_at);
+                CREATE INDEX IF NOT EXISTS usage_thread ON usage (thread_id);
+                """
+            )
+        return self._conn
+
+    def save(
+        self,
+        run_id: str,
+        thread_id: str,
+        organization_id: int,
+        database: str,
+        rows: list[dict[str, Any]],
+    ) -> None:
+        now = time.time()
+        with self._lock, self._connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO usage VALUES"
+                " (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        run_id,
+                        thread_id,
+                        organization_id,
+                        database,
+                        row["kind"],
+                        row["name"],
+                        row["calls"],
+                        row["input_tokens"],
+                        row["cached_tokens"],
+                        row["output_tokens"],
+                        row["seconds"],
+                        row["cost_usd"],
+                        row["credits"],
+                        now,
+                    )
+                    for row in rows
+                ],
+            )
+            if now - self._purged_at > 3600:
+                conn.execute(
+                    "DELETE FROM usage WHERE created_at < ?",
+                    (now - settings.usage_store_retention,),
+                )
+                self._purged_at = now
+
+    def summary(
+        self,
+        group_by: str = "organization",
+        organization_id: int | None = None,
+        thread_id: str | None = None,
+        since: float | None = None,
+        limit: int = 50,
+    ) -> list[dict[str, Any]]:
+        """Usage totals per group, most expensive first"""
+        columns = GROUPINGS[group_by]
+        filters, params = [], []
+        for column, value in (
+            ("organization_id = ?", organization_id),
+            ("thread_id = ?", thread_id),
+            ("created_at >= ?", since),
+        ):
+            if value is not None:
+                filters.append(column)
+                params.append(value)
+        where = f"WHERE {' AND '.join(filters)}" if filters else ""
+        with self._lock:
+            rows = (
+                self._connection()
+                .execute(
+                    f"""
+                    SELECT {columns},
+                        COUNT(DISTINCT run_id) AS turns,
+                        SUM(calls) AS calls,
+                        SUM(input_tokens) AS input_tokens,
+                        SUM(cached_tokens) AS cached_tokens,
+                        SUM(output_tokens) AS output_tokens,
+                        SUM(seconds) AS seconds,
+                        SUM(cost_usd) AS cost_usd,
+                        SUM(credits) AS credits
+                    FROM usage {where}
+                    GROUP BY {columns}
+                    ORDER BY SUM(cost_usd) DESC, SUM(credits) DESC
+                    LIMIT ?
+                    """,
+                    (*params, limit),
+                )
+                .fetchall()
+            )
+        return [dict(row) for row in rows]
+
+
+usage_store = UsageStore(settings.usage_store_path)
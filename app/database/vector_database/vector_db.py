@@ -1,3 +1,4 @@
+import threading
 from pathlib import Path
 from langchain_chroma import Chroma
 from langchain_openai import OpenAIEmbeddings
@@ -21,17 +22,29 @@ def load_documents(store: Chroma):
     store.add_documents(docs)
 
 
+_vector_store: Chroma | None = None
+_vector_store_lock = threading.Lock()
+
+
 def get_or_create_vector_store():
-    persist_directory = Path(vc.persist_dir)
-    vector_store = Chroma(
-        persist_directory=str(persist_directory),
-        collection_name=vc.collection_name,
-        embedding_function=OpenAIEmbeddings(model=vc.embedding_model),
-    )
-
-    # check if folder only has one file
-    if len(list(persist_directory.iterdir())) <= 1:
-        print("\n✨ Creating vector store...")
-        load_documents(vector_store)
-
-    return vector_store
+    global _vector_store
+    if _vector_store is not None:
+        return _vector_store
+
+    with _vector_store_lock:
+        if _vector_store is None:
+            persist_directory = Path(vc.persist_dir)
+            vector_store = Chroma(
+                persist_directory=str(persist_directory),
+                collection_name=vc.collection_name,
+                embedding_function=OpenAIEmbeddings(model=vc.embedding_model),
+            )
+
+            # check if folder only has one file
+            if len(list(persist_directory.iterdir())) <= 1:
+                print("\n✨ Creating vector store...")
+                load_documents(vector_store)
+
+            _vector_store = vector_store
+
+    return _vector_store
@@ -0,0 +1,198 @@
+"""
+Latency metrics shared by the agent and routers, exported in-process and to Prometheus.
+"""
+
+import statistics
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Gauge, Histogram
+
+
+class LatencyStats:
+    """Keeps a bounded window of latency samples per label set and reports percentiles."""
+
+    def __init__(self, *labels: str, window: int = 1000):
+        self.labels = labels
+        self.window = window
+        self._samples: dict[tuple[str, ...], deque[float]] = defaultdict(
+            lambda: deque(maxlen=self.window)
+        )
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, *values: str) -> None:
+        with self._lock:
+            self._samples[values].append(seconds)
+
+    def summary(self) -> list[dict[str, str | float | int]]:
+        with self._lock:
+            snapshot = {key: list(samples) for key, samples in self._samples.items()}
+
+        rows = []
+        for key, samples in sorted(snapshot.items()):
+            if len(samples) > 1:
+                cuts = statistics.quantiles(samples, n=100, method="inclusive")
+                p50, p95 = cuts[49], cuts[94]
+            else:
+                p50 = p95 = samples[0]
+            rows.append(
+                {
+                    **dict(zip(self.labels, key)),
+                    "count": len(samples),
+                    "p50": round(p50, 4),
+                    "p95": round(p95, 4),
+                }
+            )
+        return rows
+
+
+class TokenRatio:
+    """Accumulates prompt tokens and provider-cached prompt tokens per label set."""
+
+    def __init__(self, *labels: str):
+        self.labels = labels
+        self._totals: dict[tuple[str, ...], list[int]] = defaultdict(lambda: [0, 0])
+        self._lock = threading.Lock()
+
+    def observe(self, input_tokens: int, cached_tokens: int, *values: str) -> None:
+        with self._lock:
+            totals = self._totals[values]
+            totals[0] += input_tokens
+            totals[1] += cached_tokens
+
+    def summary(self) -> list[dict[str, str | float | int]]:
+        with self._lock:
+            snapshot = {key: tuple(totals) for key, totals in self._totals.items()}
+
+        return [
+            {
+                **dict(zip(self.labels, key)),
+                "input_tokens": input_tokens,
+                "cached_tokens": cached_tokens,
+                "cached_ratio": round(cached_tokens / input_tokens, 4)
+                if input_tokens
+                else 0.0,
+            }
+            for key, (input_tokens, cached_tokens) in sorted(snapshot.items())
+        ]
+
+
+llm_latency = LatencyStats("agent", "model")
+prompt_cache = TokenRatio("agent", "model")
+
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80, 160)
+
+stage_seconds = Histogram(
+    "othelia_stage_seconds",
+    "Latency of chat turn stages",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+llm_call_seconds = Histogram(
+    "othelia_llm_call_seconds",
+    "Latency of LLM calls per agent and model",
+    ["agent", "model"],
+    buckets=LATENCY_BUCKETS,
+)
+inflight_streams = Gauge(
+    "othelia_inflight_streams", "Chat streams currently being generated"
+)
+query_seconds = Histogram(
+    "othelia_query_seconds",
+    "Latency of SQL queries by execution path",
+    ["path"],
+    buckets=LATENCY_BUCKETS,
+)
+replica_refresh_seconds = Histogram(
+    "othelia_replica_refresh_seconds",
+    "Duration of local replica refreshes per view",
+    ["view"],
+    buckets=LATENCY_BUCKETS,
+)
+admission_wait_seconds = Histogram(
+    "othelia_admission_wait_seconds",
+    "Time chat streams waited in the admission queue before starting",
+    buckets=LATENCY_BUCKETS,
+)
+admission_rejections = Counter(
+    "othelia_admission_rejections_total",
+    "Chat streams rejected by admission control",
+    ["reason"],
+)
+admission_queued = Gauge(
+    "othelia_admission_queued", "Chat streams waiting for an admission slot"
+)
+run_queue_depth = Gauge(
+    "othelia_run_queue_depth",
+    "Runs waiting for a worker by priority class",
+    ["priority"],
+)
+sql_prevalidation = Counter(
+    "othelia_sql_prevalidation_total",
+    "Local SQL validation outcomes (rejected queries are warehouse round trips avoided)",
+    ["result"],
+)
+schema_prefetch = Counter(
+    "othelia_schema_prefetch_total",
+    "Speculative schema retrievals by outcome (hit: no follow-up retrieval needed)",
+    ["result"],
+)
+llm_tokens = Counter(
+    "othelia_llm_tokens_total",
+    "Model tokens per agent and model by type (input excludes cached input)",
+    ["agent", "model", "type"],
+)
+web_search_cache = Counter(
+    "othelia_web_search_cache_total",
+    "Web search lookups by outcome (memory or disk hit, miss, shared in-flight search)",
+    ["result"],
+)
+web_search_saved_seconds = Counter(
+    "othelia_web_search_saved_seconds_total",
+    "Estimated web search latency avoided by cache hits",
+)
+tool_results = Counter(
+    "othelia_tool_results_total",
+    "Tool results kept inline in the thread state or stored out of line",
+    ["tool", "storage"],
+)
+thread_run_conflicts = Counter(
+    "othelia_thread_run_conflicts_total",
+    "Runs submitted to a thread that already had one (attached, queued or rejected)",
+    ["outcome"],
+)
+db_pool_connections = Gauge(
+    "othelia_db_pool_connections",
+    "Snowflake connection pool usage by workload",
+    ["workload", "state"],
+)
+db_checkout_seconds = Histogram(
+    "othelia_db_checkout_seconds",
+    "Time to check out a Snowflake connection, including any wait and reconnect",
+    ["workload"],
+    buckets=LATENCY_BUCKETS,
+)
+db_pool_maintenance = Counter(
+    "othelia_db_pool_maintenance_total",
+    "Snowflake connections pinged, found dead or replaced by the health check, "
+    "and queries retried on a dead connection",
+    ["workload", "event"],
+)
+warehouse_query_seconds = Histogram(
+    "othelia_warehouse_query_seconds",
+    "Snowflake query latency by workload and warehouse, including the wait for a connection",
+    ["workload", "warehouse"],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+@contextmanager
+def timed(stage: str):
+    """Records the duration of the wrapped block in the stage histogram"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_seconds.labels(stage).observe(time.perf_counter() - start)
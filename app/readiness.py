@@ -0,0 +1,70 @@
+"""
+Background warm-up of heavy resources and per-component readiness reporting.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+RETRY_INITIAL = 5.0  # seconds before retrying a failed warm-up, doubled per attempt
+RETRY_MAX = 300.0
+
+
+class Readiness:
+    """Tracks components warmed in the background so `/ready` can report them."""
+
+    def __init__(self):
+        self.components: dict[str, dict[str, Any]] = {}
+
+    async def _warm(self, name: str, init: Callable[[], Any]) -> None:
+        """Initializes a component, retrying with backoff until it succeeds so a
+        transient failure at startup doesn't keep `/ready` at 503"""
+        delay = RETRY_INITIAL
+        attempts = 0
+        start = time.perf_counter()
+        self.components[name] = {"status": "starting"}
+        while True:
+            attempts += 1
+            try:
+                await asyncio.to_thread(init)
+                self.components[name] = {"status": "ready", "attempts": attempts}
+                break
+            except Exception as e:
+                logger.error(
+                    "Failed to warm up %s (attempt %d), retrying in %.0fs: %s",
+                    name,
+                    attempts,
+                    delay,
+                    str(e),
+                    exc_info=True,
+                )
+                self.components[name] = {
+                    "status": "error",
+                    "error": str(e),
+                    "attempts": attempts,
+                    "retry_in": delay,
+                }
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RETRY_MAX)
+        self.components[name]["seconds"] = round(time.perf_counter() - start, 3)
+
+    async def _warm_all(self, components: dict[str, Callable[[], Any]]) -> None:
+        await asyncio.gather(
+            *(self._warm(name, init) for name, init in components.items())
+        )
+
+    def warm_up(self, components: dict[str, Callable[[], Any]]) -> asyncio.Task:
+        """Initializes all components concurrently without blocking startup"""
+        for name in components:
+            self.components[name] = {"status": "pending"}
+        return asyncio.create_task(self._warm_all(components))
+
+    @property
+    def ready(self) -> bool:
+        return all(c["status"] == "ready" for c in self.components.values())
+
+
+readiness = Readiness()
@@ -1,23 +1,23 @@
 import asyncio
-import json
 import logging
 import uuid
-from typing import Any
 
 from fastapi import (
     APIRouter,
+    Header,
     HTTPException,
-    Request,
 )
-from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
-from langchain_core.runnables import RunnableConfig
 from sse_starlette import EventSourceResponse
 
-from app.agent.agent_config import agent_config
-from app.agent.graph import create_graph
+from app.admission import AdmissionRejected, admission
+from app.agent.runs import ThreadBusy, runs
+from app.agent.search_cache import search_cache
 from app.database.snowflake import get_database
+from app.database.usage_store import GROUPINGS, usage_store
+from app.metrics import llm_latency, prompt_cache
 from app.schemas.chat import ChatRequest
 from app.schemas.error import DatabaseNotFoundError
+from app.schemas.run import RunRequest, RunResponse
 
 logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
@@ -26,10 +26,32 @@ router = APIRouter()
 
 
 @router.post("/stream")
-async def stream(request: Request, chat_request: ChatRequest):
+async def stream(
+    chat_request: ChatRequest,
+    last_event_id: str | None = Header(default=None),
+):
+    """Starts a graph run and streams its events.
+
+    A request carrying the `Last-Event-ID` of a run that is still known reattaches
+    to that run and replays the events after that id instead of starting a new one.
+    A repeat of the message the thread is already answering attaches to that run;
+    a different message waits behind it, or is rejected with 409 when the thread's
+    queue is full or THREAD_CONFLICT is "reject".
+    """
+    if resumed := runs.resume(last_event_id):
+        run, after = resumed
+        return EventSourceResponse(
+            run.subscribe(after), media_type="text/event-stream"
+        )
+    if chat_request.thread_id and (
+        run := runs.duplicate_of(chat_request.thread_id, chat_request.message["text"])
+    ):
+        return EventSourceResponse(run.subscribe(), media_type="text/event-stream")
+
     try:
+        admission.check(chat_request.organization_id)
         database = (
-            get_database(chat_request.organization_id)
+            await asyncio.to_thread(get_database, chat_request.organization_id)
             if not chat_request.database
             else chat_request.database
         )
@@ -37,82 +59,22 @@ async def stream(request: Request, chat_request: ChatRequest):
             chat_request.thread_id if chat_request.thread_id else str(uuid.uuid4())
         )
 
-        graph = create_graph(
-            {
-                "application": chat_request.application,
-                "selected_hotels": chat_request.selected_hotels,
-            }
-        )
-
-        async def event_generator():
-            try:
-                async for chunk in graph.astream(
-                    {"messages": [HumanMessage(content=chat_request.message["text"])]},
-                    config=RunnableConfig(
-                        configurable={
-                            "thread_id": thread_id,
-                            "database": database,
-                        }
-                    ),
-                    stream_mode="updates",
-                ):
-                    if await request.is_disconnected():
-                        logger.info("Client disconnected during stream")
-                        return
-
-                    event = None
-                    data = None
-
-                    supervisor_msgs = chunk.get("supervisor", {}).get("messages", [])
-
-                    for msg in supervisor_msgs[-1:]:
-                        if isinstance(msg, AIMessage):
-                            event = "message"
-                            data = msg.content
-                        elif (
-                            isinstance(msg, ToolMessage)
-                            and msg.name in agent_config.route_config
-                        ):
-                            event = "route"
-                            data = json.dumps(
-                                {
-                                    "destination": agent_config.route_config[msg.name][
-                                        "name"
-                                    ],
-                                    "message": agent_config.route_config[msg.name][
-                                        "message"
-                                    ],
-                                }
-                            )
-
-                    if event is not None:
-                        yield {"event": event, "data": data}
-
-                yield {
-                    "event": "done",
-                    "data": json.dumps({"threadId": thread_id, "database": database}),
-                }
-
-            except asyncio.CancelledError:
-                logger.info("Stream generator cancelled")
-                raise
-            except ValueError as ve:
-                logger.error("ValueError in stream: %s", str(ve), exc_info=True)
-                yield {
-                    "event": "error",
-                    "data": "Invalid input provided. Please try again.",
-                }
-            except Exception as e:
-                logger.error("Unexpected error in stream: %s", str(e), exc_info=True)
-                yield {
-                    "event": "error",
-                    "data": "An unexpected error occurred. Please try again later.",
-                }
-
+        run = runs.submit(chat_request, thread_id, database, cancel_when_abandoned=True)
         return EventSourceResponse(
-            event_generator(),
+            run.subscribe(),
             media_type="text/event-stream",
         )
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many concurrent requests. Please try again shortly.",
+            headers={"Retry-After": str(e.retry_after)},
+        ) from e
+    except ThreadBusy as e:
+        raise HTTPException(
+            status_code=409,
+            detail=f"This thread is busy with run {e.active_run_id}.",
+        ) from e
     except DatabaseNotFoundError as e:
         logger.error(
             "Database not found with organization ID: %s; Error: %s",
@@ -132,6 +94,118 @@ async def stream(request: Request, chat_request: ChatRequest):
         ) from e
 
 
+@router.get("/stream/{run_id}")
+async def resume_stream(run_id: str, last_event_id: str | None = Header(default=None)):
+    """Reattaches to a run, replaying events after `Last-Event-ID` (all when absent)"""
+    run = runs.runs.get(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Run not found or expired.")
+
+    resumed = runs.resume(last_event_id)
+    after = resumed[1] if resumed and resumed[0] is run else 0
+    return EventSourceResponse(run.subscribe(after), media_type="text/event-stream")
+
+
+@router.post("/runs", response_model=RunResponse, status_code=202)
+async def submit_run(run_request: RunRequest):
+    """Queues a graph run in the background and returns its id.
+
+    Follow its events with `GET /runs/{run_id}/stream` or poll `GET /runs/{run_id}`.
+    A repeat of the message the thread is already answering returns that run.
+    """
+    if run_request.thread_id and (
+        run := runs.duplicate_of(run_request.thread_id, run_request.message["text"])
+    ):
+        return runs.status(run.id)
+    try:
+        database = run_request.database or await asyncio.to_thread(
+            get_database, run_request.organization_id
+        )
+        thread_id = run_request.thread_id or str(uuid.uuid4())
+        run = runs.submit(run_request, thread_id, database, run_request.priority)
+        return runs.status(run.id)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many queued runs. Please try again shortly.",
+            headers={"Retry-After": str(e.retry_after)},
+        ) from e
+    except ThreadBusy as e:
+        raise HTTPException(
+            status_code=409,
+            detail=f"This thread is busy with run {e.active_run_id}.",
+        ) from e
+    except DatabaseNotFoundError as e:
+        logger.error(
+            "Database not found with organization ID: %s; Error: %s",
+            run_request.organization_id,
+            str(e),
+            exc_info=True,
+        )
+        raise HTTPException(status_code=404, detail="Database not found.") from e
+
+
+@router.get("/runs/{run_id}", response_model=RunResponse)
+async def run_status(run_id: str):
+    status = runs.status(run_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Run not found or expired.")
+    return status
+
+
+@router.get("/runs/{run_id}/stream")
+async def run_events(run_id: str, last_event_id: str | None = Header(default=None)):
+    return await resume_stream(run_id, last_event_id)
+
+
+@router.delete("/runs/{run_id}", response_model=RunResponse)
+async def cancel_run(run_id: str):
+    if not runs.cancel(run_id):
+        raise HTTPException(status_code=404, detail="Run not found or finished.")
+    return runs.status(run_id)
+
+
 @router.get("/new-thread")
 async def create_new_thread():
     return {"thread_id": str(uuid.uuid4())}
+
+
+@router.get("/model-latency")
+async def model_latency():
+    """p50/p95 LLM call latency per agent and model over the recent window"""
+    return llm_latency.summary()
+
+
+@router.get("/web-search-cache")
+async def web_search_cache_stats():
+    """Hit rate and estimated latency saved by the web search cache"""
+    return search_cache.summary()
+
+
+@router.get("/usage")
+async def usage_summary(
+    group_by: str = "organization",
+    organization_id: int | None = None,
+    thread_id: str | None = None,
+    since: float | None = None,
+    limit: int = 50,
+):
+    """Token, cost, tool-time and warehouse-credit totals per organization, thread,
+    run or item (agent:model, tool, warehouse), most expensive first.
+
+    `since` is a Unix timestamp.
+    """
+    if group_by not in GROUPINGS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"group_by must be one of: {', '.join(GROUPINGS)}",
+        )
+    return await asyncio.to_thread(
+        usage_store.summary, group_by, organization_id, thread_id, since, limit
+    )
+
+
+@router.get("/prompt-cache")
+async def prompt_cache_ratio():
+    """Share of prompt tokens served from the provider's prefix cache per agent and model"""
+    return prompt_cache.summary()
@@ -1,9 +1,12 @@
+import asyncio
+import json
 import logging
 
-from fastapi import APIRouter, HTTPException
-from sqlalchemy.sql import text
+from fastapi import APIRouter, HTTPException, Response
 
-from app.database.snowflake import get_snowflake_conn
+from app.database.query import execute_query
+from app.database.sql_validator import load_column_types
+from app.schemas.error import SQLValidationError
 from app.schemas.database import DatabaseRequest, DatabaseResponse
 
 logging.basicConfig(level=logging.ERROR)
@@ -14,14 +17,22 @@ router = APIRouter()
 
 
 @router.post("/query", response_model=DatabaseResponse)
-async def query_table(request: DatabaseRequest):
+async def query_table(request: DatabaseRequest, response: Response):
+    """Runs a query; X-Column-Types carries the schema model types of the result
+    columns so the interpreter can build typed DataFrames"""
     try:
-        with get_snowflake_conn() as conn:
-            conn.execute(text(f"USE DATABASE {request.database};"))
-            result = conn.execute(text(request.sql))
-
-        return [dict(row) for row in result.mappings().all()]
-
+        rows = await asyncio.to_thread(
+            execute_query, request.database, request.sql, request.workload
+        )
+        if rows:
+            types = load_column_types()
+            response.headers["X-Column-Types"] = json.dumps(
+                {name: types[name.upper()] for name in rows[0] if name.upper() in types}
+            )
+        return rows
+
+    except SQLValidationError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid SQL: {str(e)}") from e
     except Exception as e:
         logger.error("Snowflake Error: %s", str(e), exc_info=True)
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}") from e
@@ -1,33 +1,100 @@
+import asyncio
+import hashlib
+import json
 import logging
 
-from fastapi import APIRouter, HTTPException
-from sqlalchemy.sql import text
+from fastapi import APIRouter, Header, HTTPException, Response
 
-from app.database.snowflake import get_database, get_snowflake_conn
-from app.schemas.user import HotelResponse
+from app.cache import TTLCache
+from app.config import db_settings, settings
+from app.database.query import execute_query
+from app.database.snowflake import get_database
+from app.schemas.core import Hotel
+from app.schemas.user import HotelBatchRequest, HotelBatchResponse, HotelResponse
 
 logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+hotel_cache: TTLCache[int, HotelResponse] = TTLCache(
+    maxsize=settings.hotel_cache_size, ttl=settings.hotel_cache_ttl
+)
+# batch lookups in flight, at most one per metadata connection, so a cold batch
+# doesn't fill the default executor with threads waiting for the pool
+batch_slots = asyncio.Semaphore(db_settings.warehouse_concurrency.get("metadata", 5))
+
+
+def load_hotels(organization_id: int) -> HotelResponse:
+    """Returns the org's hotel list from the cache, querying the warehouse on a miss"""
+    cached = hotel_cache.get(organization_id)
+    if cached is not None:
+        return cached
+
+    database = get_database(organization_id)
+    rows = execute_query(
+        database, "select ID, Name from DM_BI.VW_HOTEL", workload="metadata"
+    )
+    hotels: list[Hotel] = [{"id": row["id"], "name": row["name"]} for row in rows]
+    version = hashlib.sha256(
+        json.dumps([database, hotels], sort_keys=True, default=str).encode()
+    ).hexdigest()[:16]
+
+    response = HotelResponse(hotels=hotels, database=database, version=version)
+    hotel_cache.set(organization_id, response)
+    return response
+
 
 @router.get("/{organization_id}", response_model=HotelResponse)
-async def get_user_context(organization_id: int):
+async def get_user_context(
+    organization_id: int,
+    response: Response,
+    if_none_match: str | None = Header(default=None),
+):
     try:
-        database = get_database(organization_id)
-        with get_snowflake_conn() as conn:
-            conn.execute(text(f"USE DATABASE {database};"))
-            query = text("select ID, Name from DM_BI.VW_HOTEL")
-            result = conn.execute(query)
-            hotels = result.fetchall()
-            return {
-                "hotels": [{"id": row[0], "name": row[1]} for row in hotels],
-                "database": database,
-            }
-
+        context = await asyncio.to_thread(load_hotels, organization_id)
     except Exception as e:
         logger.error("Failed to fetch user context: %s", str(e), exc_info=True)
         raise HTTPException(
             status_code=500, detail=f"Failed to fetch user context: {str(e)}"
         ) from e
+
+    etag = f'"{context.version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    tags = [tag.strip().removeprefix("W/") for tag in (if_none_match or "").split(",")]
+    if "*" in tags or etag in tags:
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return context
+
+
+async def load_hotels_bounded(organization_id: int) -> HotelResponse:
+    cached = hotel_cache.get(organization_id)
+    if cached is not None:
+        return cached
+    async with batch_slots:
+        return await asyncio.to_thread(load_hotels, organization_id)
+
+
+@router.post("/batch", response_model=HotelBatchResponse)
+async def get_user_context_batch(request: HotelBatchRequest):
+    """Fetches hotel lists for several organizations concurrently, with as many
+    warehouse lookups at a time as the metadata pool has connections"""
+    organization_ids = list(dict.fromkeys(request.organization_ids))
+    results = await asyncio.gather(
+        *(load_hotels_bounded(org_id) for org_id in organization_ids),
+        return_exceptions=True,
+    )
+
+    organizations: dict[int, HotelResponse] = {}
+    errors: dict[int, str] = {}
+    for org_id, result in zip(organization_ids, results):
+        if isinstance(result, BaseException):
+            logger.error(
+                "Failed to fetch user context for %s: %s", org_id, str(result)
+            )
+            errors[org_id] = "Failed to fetch user context"
+        else:
+            organizations[org_id] = result
+    return {"organizations": organizations, "errors": errors}
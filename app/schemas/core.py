@@ -19,8 +19,9 @@ class Hotel(TypedDict):
 
 
 class Agent(TypedDict):
-    model: str
+    model: str  # tier name from AgentConfig.model_tiers
     system_prompt: str
+    context: str
     selected_tools: list[str]
     name: str
 
@@ -1,10 +1,11 @@
-from typing import Any
+from typing import Any, Literal
 from pydantic import BaseModel, RootModel
 
 
 class DatabaseRequest(BaseModel):
     sql: str
     database: str
+    workload: Literal["analysis", "export"] = "analysis"
     model_config = {
         "json_schema_extra": {
             "example": {"sql": "SELECT * FROM users", "database": "my_database"}
@@ -1,2 +1,8 @@
 class DatabaseNotFoundError(Exception):
     pass
+
+
+class SQLValidationError(ValueError):
+    def __init__(self, errors: list[str]):
+        super().__init__(" ".join(errors))
+        self.errors = errors
@@ -0,0 +1,18 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+from app.schemas.chat import ChatRequest
+
+
+class RunRequest(ChatRequest):
+    priority: Literal["interactive", "scheduled"] = "scheduled"
+
+
+class RunResponse(BaseModel):
+    run_id: str
+    thread_id: str
+    database: str
+    priority: Literal["interactive", "scheduled"]
+    status: Literal["queued", "running", "done", "failed", "cancelled", "interrupted"]
+    result: str | None = None
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from app.schemas.core import Hotel
 
@@ -6,3 +6,14 @@ from app.schemas.core import Hotel
 class HotelResponse(BaseModel):
     hotels: list[Hotel]
     database: str
+    version: str
+
+
+class HotelBatchRequest(BaseModel):
+    organization_ids: list[int] = Field(..., alias="organizationIds", max_length=100)
+    model_config = {"json_schema_extra": {"example": {"organizationIds": [38, 41]}}}
+
+
+class HotelBatchResponse(BaseModel):
+    organizations: dict[int, HotelResponse]
+    errors: dict[int, str]
@@ -0,0 +1,140 @@
+"""
+Per-turn accounting of model tokens and cost, tool time and warehouse credits.
+
+A `TurnUsage` is bound to the context of a graph run, so model calls, tools and
+Snowflake queries made on the run's behalf (in its tasks or worker threads) add to
+it without being passed the run. Costs are estimates: model calls are priced with
+`AgentConfig.model_prices`, and warehouse credits are query time at the
+warehouse's WAREHOUSE_CREDITS_PER_HOUR rate, which ignores idle time and queries
+sharing a running warehouse.
+"""
+
+import threading
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Any
+
+from app.agent.agent_config import agent_config
+from app.config import db_settings
+from app.metrics import llm_tokens
+
+DEFAULT_CREDITS_PER_HOUR = 1.0  # an X-Small warehouse
+
+_turn: ContextVar["TurnUsage | None"] = ContextVar("turn_usage", default=None)
+
+
+def _item() -> dict[str, float]:
+    return {
+        "calls": 0,
+        "input_tokens": 0,
+        "cached_tokens": 0,
+        "output_tokens": 0,
+        "seconds": 0.0,
+        "cost_usd": 0.0,
+        "credits": 0.0,
+    }
+
+
+class TurnUsage:
+    """Usage of one graph run, itemized by (kind, name): model calls per agent and
+    model, hedged calls cancelled after the other request won (kind "hedge"), tool
+    calls per tool, and queries per warehouse."""
+
+    def __init__(self):
+        self.items: dict[tuple[str, str], dict[str, float]] = defaultdict(_item)
+        self._lock = threading.Lock()
+
+    def record_model(self, agent: str, model: str, usage: dict[str, Any]) -> None:
+        cached = usage.get("input_token_details", {}).get("cache_read", 0) or 0
+        input_tokens = usage.get("input_tokens", 0)
+        output_tokens = usage.get("output_tokens", 0)
+        cost = 0.0
+        if price := agent_config.model_prices.get(model):
+            cost = (
+                (input_tokens - cached) * price.input
+                + cached * price.cached_input
+                + output_tokens * price.output
+            ) / 1_000_000
+        llm_tokens.labels(agent, model, "input").inc(input_tokens - cached)
+        llm_tokens.labels(agent, model, "cached").inc(cached)
+        llm_tokens.labels(agent, model, "output").inc(output_tokens)
+        with self._lock:
+            item = self.items["model", f"{agent}:{model}"]
+            item["calls"] += 1
+            item["input_tokens"] += input_tokens
+            item["cached_tokens"] += cached
+            item["output_tokens"] += output_tokens
+            item["cost_usd"] += cost
+
+    def record_hedge(self, agent: str, model: str, input_tokens: int) -> None:
+        """Counts a cancelled hedged call. The provider still bills its prompt, which
+        is estimated as the winning call's input tokens at the uncached price; its
+        partial output is not known."""
+        cost = 0.0
+        if price := agent_config.model_prices.get(model):
+            cost = input_tokens * price.input / 1_000_000
+        llm_tokens.labels(agent, model, "hedged").inc(input_tokens)
+        with self._lock:
+            item = self.items["hedge", f"{agent}:{model}"]
+            item["calls"] += 1
+            item["input_tokens"] += input_tokens
+            item["cost_usd"] += cost
+
+    def record_tool(self, name: str, seconds: float) -> None:
+        with self._lock:
+            item = self.items["tool", name]
+            item["calls"] += 1
+            item["seconds"] += seconds
+
+    def record_query(self, warehouse: str, seconds: float) -> None:
+        rate = db_settings.warehouse_credits_per_hour.get(
+            warehouse, DEFAULT_CREDITS_PER_HOUR
+        )
+        with self._lock:
+            item = self.items["warehouse", warehouse]
+            item["calls"] += 1
+            item["seconds"] += seconds
+            item["credits"] += seconds * rate / 3600
+
+    def rows(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return [
+                {"kind": kind, "name": name, **item}
+                for (kind, name), item in sorted(self.items.items())
+            ]
+
+    def totals(self) -> dict[str, Any]:
+        """Turn totals in the shape sent with the `done` event"""
+        rows = self.rows()
+        models = [row for row in rows if row["kind"] in ("model", "hedge")]
+        calls = {kind: 0 for kind in ("model", "hedge")}
+        for row in models:
+            calls[row["kind"]] += row["calls"]
+        return {
+            "modelCalls": calls["model"],
+            "hedgedCalls": calls["hedge"],
+            "inputTokens": sum(row["input_tokens"] for row in models),
+            "cachedTokens": sum(row["cached_tokens"] for row in models),
+            "outputTokens": sum(row["output_tokens"] for row in models),
+            "costUsd": round(sum(row["cost_usd"] for row in models), 6),
+            "warehouseSeconds": round(
+                sum(row["seconds"] for row in rows if row["kind"] == "warehouse"), 3
+            ),
+            "warehouseCredits": round(sum(row["credits"] for row in rows), 6),
+            "toolSeconds": {
+                row["name"]: round(row["seconds"], 3)
+                for row in rows
+                if row["kind"] == "tool"
+            },
+        }
+
+
+def start_turn() -> TurnUsage:
+    """Binds a new TurnUsage to the current context and returns it"""
+    turn = TurnUsage()
+    _turn.set(turn)
+    return turn
+
+
+def current_turn() -> TurnUsage | None:
+    return _turn.get()
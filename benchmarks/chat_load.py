@@ -0,0 +1,195 @@
+"""
+Offline load test for /api/chatbot/stream.
+
+Runs the real FastAPI app and the interpreter in-process against the stand-ins in
+`benchmarks/fakes.py` and drives concurrent SSE clients through scripted data
+questions. No OpenAI, Tavily or Snowflake calls are made.
+
+    python -m benchmarks.chat_load --clients 20 --turns 5 --output bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime, timezone
+
+import httpx
+import uvicorn
+
+from benchmarks import fakes
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    if not samples:
+        return {}
+    if len(samples) == 1:
+        return {"p50": samples[0], "p95": samples[0], "p99": samples[0]}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
+
+
+def chat_payload(text: str, thread_id: str | None) -> dict:
+    return {
+        "message": {
+            "text": text,
+            "role": "user",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        },
+        "selectedHotels": fakes.HOTELS,
+        "organizationId": fakes.ORGANIZATION_ID,
+        "threadId": thread_id,
+        "application": {"name": "Intellisight", "description": "reports hotel KPIs"},
+        "database": None,
+    }
+
+
+QUESTIONS = (
+    "What was ADR by hotel for the last quarter?",
+    "How did occupancy compare with the same month last year?",
+    "Which hotels had the highest RevPAR growth this year?",
+)
+
+
+async def run_turn(
+    client: httpx.AsyncClient, thread_id: str | None, text: str
+) -> dict:
+    """Sends one chat message and reads the SSE stream until `done` or `error`"""
+    start = time.perf_counter()
+    first_event = None
+    event = None
+    done: dict = {}
+
+    async with client.stream(
+        "POST",
+        "/api/chatbot/stream",
+        json=chat_payload(text, thread_id),
+    ) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if line.startswith("event:"):
+                event = line.removeprefix("event:").strip()
+                first_event = first_event or time.perf_counter() - start
+            elif line.startswith("data:") and event == "done":
+                done = json.loads(line.removeprefix("data:").strip())
+            elif line.startswith("data:") and event == "error":
+                raise RuntimeError(line)
+
+    return {
+        "ttfe": first_event or 0.0,
+        "latency": time.perf_counter() - start,
+        "thread_id": done.get("threadId"),
+    }
+
+
+async def client_loop(base_url: str, turns: int, results: list, errors: list):
+    async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+        thread_id = None
+        for number in range(turns):
+            # a new message each turn, so none attaches to the last run as a duplicate
+            text = f"{QUESTIONS[number % len(QUESTIONS)]} (turn {number + 1})"
+            try:
+                result = await run_turn(client, thread_id, text)
+                thread_id = result["thread_id"]
+                results.append(result)
+            except Exception as e:
+                errors.append(str(e))
+
+
+async def sample_rss(samples: list, start: float, stop: asyncio.Event):
+    while not stop.is_set():
+        samples.append((round(time.perf_counter() - start, 2), round(fakes.rss_mb(), 1)))
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=1)
+        except asyncio.TimeoutError:
+            pass
+
+
+Serving = tuple[uvicorn.Server, asyncio.Task]
+
+
+async def serve(app, port: int) -> Serving:
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    return server, task
+
+
+async def shutdown(servers: list[Serving]) -> None:
+    """Stops the servers and waits for their lifespan shutdown to finish"""
+    for server, _ in servers:
+        server.should_exit = True
+    await asyncio.gather(*(task for _, task in servers))
+
+
+async def main(args: argparse.Namespace) -> dict:
+    fakes.install(args.interpreter_port, args.api_port, llm_latency=args.llm_latency)
+
+    from main import app as api_app
+
+    servers = [
+        await serve(fakes.load_interpreter_app(), args.interpreter_port),
+        await serve(api_app, args.api_port),
+    ]
+
+    results: list[dict] = []
+    errors: list[str] = []
+    rss: list[tuple[float, float]] = []
+    stop = asyncio.Event()
+    start = time.perf_counter()
+    sampler = asyncio.create_task(sample_rss(rss, start, stop))
+
+    await asyncio.gather(
+        *(
+            client_loop(
+                f"http://127.0.0.1:{args.api_port}", args.turns, results, errors
+            )
+            for _ in range(args.clients)
+        )
+    )
+
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await sampler
+    await shutdown(servers)
+
+    return {
+        "clients": args.clients,
+        "turns_per_client": args.turns,
+        "llm_latency": args.llm_latency,
+        "completed_turns": len(results),
+        "errors": len(errors),
+        "elapsed_s": round(elapsed, 2),
+        "turns_per_s": round(len(results) / elapsed, 3),
+        "time_to_first_event_s": percentiles([r["ttfe"] for r in results]),
+        "latency_s": percentiles([r["latency"] for r in results]),
+        "rss_mb": {
+            "start": rss[0][1] if rss else None,
+            "end": rss[-1][1] if rss else None,
+            "samples": rss,
+        },
+        "error_samples": errors[:5],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--api-port", type=int, default=8765)
+    parser.add_argument("--interpreter-port", type=int, default=8766)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(main(args))
+    summary = {k: v for k, v in report.items() if k != "rss_mb"}
+    summary["rss_mb"] = {k: v for k, v in report["rss_mb"].items() if k != "samples"}
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
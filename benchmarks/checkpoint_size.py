@@ -0,0 +1,180 @@
+"""
+Checkpoint write time and per-thread memory with tool results inline or stored out of line.
+
+Replays a thread of data questions through a minimal LangGraph graph on a
+MemorySaver (the app's checkpointer). Each turn appends an sql_executor result
+and a code_interpreter response of realistic size as ToolMessages, either as
+returned by the tools (inline) or through app.agent.artifacts.offload (the
+reference and summary the tools now return). Reports the time spent writing
+checkpoints, the time to reload the thread state, and the bytes the thread holds
+in the checkpointer after each number of turns. The artifact store lives in a
+temporary directory for the run.
+
+    python -m benchmarks.checkpoint_size --turns 5 10 20 --rows 500
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Any
+
+from benchmarks.fakes import ROOT
+
+
+def nbytes(value: Any) -> int:
+    """Serialized bytes held in a MemorySaver structure"""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode())
+    if isinstance(value, dict):
+        return sum(nbytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(nbytes(item) for item in value)
+    return 0
+
+
+def thread_bytes(saver, thread_id: str) -> int:
+    return (
+        nbytes(saver.storage.get(thread_id, {}))
+        + sum(nbytes(blob) for key, blob in saver.blobs.items() if key[0] == thread_id)
+        + sum(
+            nbytes(write) for key, write in saver.writes.items() if key[0] == thread_id
+        )
+    )
+
+
+def tool_outputs(rows: int) -> dict[str, Any]:
+    sql_rows = [
+        {
+            "HOTEL_ID": 6000 + i % 50,
+            "HOTEL_NAME": f"Courtyard Downtown {i % 50}",
+            "BUSINESS_DATE": 20250801 + i % 28,
+            "ROOM_REVENUE": round(120 + i * 0.37, 2),
+            "ROOMS": 1 + i % 4,
+        }
+        for i in range(rows)
+    ]
+    interpreter = {
+        "status": "success",
+        "output": "\n".join(
+            f"{row['HOTEL_NAME']:<24} {row['ROOM_REVENUE']:>10}" for row in sql_rows
+        ),
+        "errors": "",
+        "images": ["/images/temp/adr.png"],
+        "objects": {
+            "df": {
+                "type": "DataFrame",
+                "shape": [rows, 5],
+                "columns": list(sql_rows[0]),
+                "data": sql_rows[:5],
+                "file": "/files/temp/df.csv",
+            },
+            "by_hotel": {f"Courtyard Downtown {i}": 150.0 + i for i in range(50)},
+        },
+        "files": ["/files/temp/df.csv"],
+        "execution_time": 1.7,
+    }
+    return {"sql_executor": sql_rows, "code_interpreter": interpreter}
+
+
+def replay(turns: list[int], rows: int, offloaded: bool) -> list[dict[str, Any]]:
+    from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+    from langgraph.checkpoint.memory import MemorySaver
+    from langgraph.graph import START, MessagesState, StateGraph
+
+    from app.agent.artifacts import offload
+    from app.config import settings
+
+    class TimedSaver(MemorySaver):
+        seconds = 0.0
+
+        def put(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return super().put(*args, **kwargs)
+            finally:
+                self.seconds += time.perf_counter() - start
+
+        def put_writes(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return super().put_writes(*args, **kwargs)
+            finally:
+                self.seconds += time.perf_counter() - start
+
+    settings.tool_result_inline_chars = 4000 if offloaded else 0
+    outputs = tool_outputs(rows)
+
+    def turn(state: MessagesState) -> dict:
+        messages = []
+        for name, result in outputs.items():
+            call_id = f"call_{len(state['messages'])}_{name}"
+            content = offload(name, result, "bench")
+            messages += [
+                AIMessage(
+                    content="",
+                    tool_calls=[{"name": name, "args": {}, "id": call_id}],
+                ),
+                ToolMessage(
+                    content=content
+                    if isinstance(content, str)
+                    else json.dumps(content, default=str),
+                    name=name,
+                    tool_call_id=call_id,
+                ),
+            ]
+        return {"messages": [*messages, AIMessage(content="ADR was highest at …")]}
+
+    saver = TimedSaver()
+    builder = StateGraph(MessagesState)
+    builder.add_node("turn", turn)
+    builder.add_edge(START, "turn")
+    graph = builder.compile(checkpointer=saver)
+    config = {"configurable": {"thread_id": "bench"}}
+
+    report = []
+    for number in range(1, max(turns) + 1):
+        graph.invoke(
+            {"messages": [HumanMessage(content=f"Question {number}")]}, config
+        )
+        if number in turns:
+            start = time.perf_counter()
+            graph.get_state(config)
+            report.append(
+                {
+                    "turns": number,
+                    "checkpoint_write_ms": round(1000 * saver.seconds, 1),
+                    "state_reload_ms": round(1000 * (time.perf_counter() - start), 2),
+                    "thread_kib": round(thread_bytes(saver, "bench") / 1024, 1),
+                }
+            )
+    return report
+
+
+def main(turns: list[int], rows: int) -> dict:
+    os.chdir(ROOT)
+    os.environ["ARTIFACT_STORE_PATH"] = os.path.join(
+        tempfile.mkdtemp(prefix="othelia-bench-"), "artifacts.sqlite3"
+    )
+    from app.database.artifact_store import artifact_store
+
+    inline = replay(turns, rows, offloaded=False)
+    offloaded = replay(turns, rows, offloaded=True)
+    count, size = artifact_store.size()
+    return {
+        "rows": rows,
+        "inline": inline,
+        "offloaded": offloaded,
+        "artifact_store": {"artifacts": count, "kib": round(size / 1024, 1)},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, nargs="+", default=[5, 10, 20])
+    parser.add_argument("--rows", type=int, default=500, help="rows per SQL result")
+    args = parser.parse_args()
+    print(json.dumps(main(args.turns, args.rows), indent=2))
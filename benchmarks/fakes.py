@@ -0,0 +1,259 @@
+"""
+Local stand-ins for OpenAI, Snowflake and the embedding API used by the benchmarks.
+
+`install()` must run before anything under `app` is imported: it sets the
+environment the settings classes read at import time, then swaps the Snowflake
+engine, the chat models and the embeddings for offline versions.
+"""
+
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Any
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from sqlalchemy import create_engine, event
+
+ROOT = Path(__file__).resolve().parent.parent
+ORGANIZATION_ID = 38
+DATABASE = "DB_BENCH"
+HOTELS = [{"id": 600 + i, "name": f"Hotel {i}"} for i in range(10)]
+
+SQL = """-- Room revenue by hotel
+SELECT h.NAME AS hotel_name, SUM(bob.ROOM_REVENUE) AS room_revenue, SUM(bob.ROOMS) AS room_nights
+FROM dm_bi.VW_ISP_PMS_BOB AS bob
+JOIN dm_bi.VW_HOTEL AS h ON bob.HOTEL_ID = h.ID
+WHERE bob.BUSINESS_DATE BETWEEN 20250801 AND 20251031
+GROUP BY h.NAME"""
+
+CODE = f'''df = execute_sql("""{SQL}""")
+df["adr"] = df["room_revenue"] / df["room_nights"]
+print(df.sort_values("adr", ascending=False).head())'''
+
+
+CALLS: list[int] = []  # estimated input tokens of each scripted model call
+
+
+def _tool_call(name: str, args: dict[str, Any]) -> AIMessage:
+    return AIMessage(
+        content="",
+        tool_calls=[{"name": name, "args": args, "id": f"call_{uuid.uuid4().hex}"}],
+    )
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Replays the supervisor → sql_agent → analysis_agent flow of a data question.
+
+    The role is inferred from the bound tools; the step from the tool messages seen
+    since the last user message. `latency` simulates the provider's response time.
+    """
+
+    latency: float = 0.3
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools])
+
+    def _reply(self, messages: list[BaseMessage], tools: list[dict]) -> AIMessage:
+        names = {t["function"]["name"] for t in tools}
+        last_human = max(
+            (i for i, m in enumerate(messages) if isinstance(m, HumanMessage)),
+            default=-1,
+        )
+        turn = messages[last_human + 1 :]
+        tool_results = [m.name for m in turn if isinstance(m, ToolMessage)]
+        last_tool = tool_results[-1] if tool_results else None
+
+        if "transfer_to_sql_agent" in names:
+            handbacks = tool_results.count("transfer_back_to_supervisor")
+            direct = "transfer_to_data_agent" in names
+            if handbacks == 0:
+                message = _tool_call(
+                    "transfer_to_data_agent" if direct else "transfer_to_sql_agent", {}
+                )
+            elif handbacks == 1 and not direct:
+                message = _tool_call("transfer_to_analysis_agent", {})
+            else:
+                message = AIMessage(
+                    content="Hotel 3 leads the portfolio on ADR for the period."
+                )
+        elif "sql_executor" in names:
+            if last_tool == "sql_executor":
+                message = AIMessage(content=f"```sql\n{SQL}\n```")
+            elif last_tool == "schema_retriever":
+                message = _tool_call("sql_executor", {"sql": f"{SQL}\nLIMIT 10"})
+            else:
+                message = _tool_call("schema_retriever", {"query": "room revenue"})
+        elif "code_interpreter" in names:
+            if last_tool == "code_interpreter":
+                message = AIMessage(content="ADR ranges from $120 to $180.")
+            else:
+                message = _tool_call("code_interpreter", {"code": CODE})
+        else:
+            message = AIMessage(content="Summary of the earlier conversation.")
+
+        # rough prompt size: characters / 4 over the messages and tool schemas
+        text = "".join(
+            f"{m.content}{getattr(m, 'tool_calls', '')}" for m in messages
+        ) + str(tools)
+        input_tokens = len(text) // 4
+        CALLS.append(input_tokens)
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": 50,
+            "total_tokens": input_tokens + 50,
+            "input_token_details": {"cache_read": min(1536, input_tokens)},
+        }
+        return message
+
+    def _generate(self, messages, stop=None, run_manager=None, tools=(), **kwargs):
+        time.sleep(self.latency)
+        message = self._reply(messages, list(tools))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self, messages, stop=None, run_manager=None, tools=(), **kwargs
+    ):
+        await asyncio.sleep(self.latency)
+        message = self._reply(messages, list(tools))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def _seed(directory: Path, rows: int) -> None:
+    with sqlite3.connect(directory / "meta.db") as db:
+        db.execute(
+            "CREATE TABLE TBL_ORGANIZATION_CONFIG (ORGANIZATION_ID INTEGER, DATAWAREHOUSE_DATABASE_NAME TEXT)"
+        )
+        db.execute(
+            "INSERT INTO TBL_ORGANIZATION_CONFIG VALUES (?, ?)",
+            (ORGANIZATION_ID, DATABASE),
+        )
+
+    with sqlite3.connect(directory / "dm_bi.db") as db:
+        db.execute("CREATE TABLE VW_HOTEL (ID INTEGER, NAME TEXT, ROOMS INTEGER)")
+        db.executemany(
+            "INSERT INTO VW_HOTEL VALUES (?, ?, 120)",
+            [(h["id"], h["name"]) for h in HOTELS],
+        )
+        db.execute(
+            """CREATE TABLE VW_ISP_PMS_BOB (
+                ID INTEGER, HOTEL_ID INTEGER, BUSINESS_DATE INTEGER, ROOMS INTEGER,
+                ROOM_REVENUE REAL, PMS_MARKET_SEGMENT TEXT)"""
+        )
+        db.executemany(
+            "INSERT INTO VW_ISP_PMS_BOB VALUES (?, ?, ?, 1, ?, ?)",
+            [
+                (
+                    i,
+                    HOTELS[i % len(HOTELS)]["id"],
+                    20250801 + (i % 28) + 100 * (i % 3),
+                    100 + (i * 37) % 120,
+                    ("TRANSIENT", "GROUP", "CONTRACT")[i % 3],
+                )
+                for i in range(rows)
+            ],
+        )
+
+
+def sqlite_engine(directory: Path, rows: int = 50_000):
+    """SQLite stand-in for Snowflake with META and DM_BI attached as schemas"""
+    _seed(directory, rows)
+    engine = create_engine(
+        f"sqlite:///{directory / 'main.db'}",
+        connect_args={"check_same_thread": False},
+        pool_size=5,
+        max_overflow=10,
+    )
+
+    @event.listens_for(engine, "connect")
+    def attach(dbapi_connection, _):
+        for schema in ("meta", "dm_bi"):
+            dbapi_connection.execute(
+                f"ATTACH DATABASE '{directory / schema}.db' AS {schema}"
+            )
+
+    @event.listens_for(engine, "before_cursor_execute", retval=True)
+    def skip_use(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("USE "):
+            return "SELECT 1", ()
+        return statement, parameters
+
+    return engine
+
+
+def install(interpreter_port: int, api_port: int, llm_latency: float = 0.3):
+    """Points the app at local stand-ins; returns the temporary working directory"""
+    workdir = Path(tempfile.mkdtemp(prefix="othelia-bench-"))
+    os.chdir(ROOT)
+    sys.path.insert(0, str(ROOT))
+
+    os.environ.update(
+        {
+            "INTERPRETER_URL": f"http://127.0.0.1:{interpreter_port}",
+            "SQL_API_URL": f"http://127.0.0.1:{api_port}",
+            "OPENAI_API_KEY": "sk-offline",
+            "TAVILY_API_KEY": "tvly-offline",
+            "LANGSMITH_TRACING": "false",
+            "ORCHESTRATOR_DATABASE": "META_DB",
+        }
+    )
+
+    from app.agent import models
+    from app.config import vector_store_config
+    from app.database import snowflake
+    from app.database.vector_database import vector_db
+
+    engine = sqlite_engine(workdir)
+    snowflake.create_snowflake_engine = lambda workload="analysis": engine
+    models.load_chat_model = lambda *args, **kwargs: ScriptedChatModel(
+        latency=llm_latency
+    )
+    vector_db.OpenAIEmbeddings = lambda **kwargs: DeterministicFakeEmbedding(size=256)
+    vector_store_config.persist_dir = str(workdir / "chroma")
+    os.makedirs(vector_store_config.persist_dir)
+
+    return workdir
+
+
+def load_interpreter_module():
+    """Imports interpreter/main.py in-process without clashing with the root main.py"""
+    import importlib.util
+
+    sys.path.insert(0, str(ROOT / "interpreter"))
+    spec = importlib.util.spec_from_file_location(
+        "interpreter_main", ROOT / "interpreter" / "main.py"
+    )
+    module = importlib.util.module_from_spec(spec)  # type: ignore[arg-type]
+    spec.loader.exec_module(module)  # type: ignore[union-attr]
+    return module
+
+
+def load_interpreter_app():
+    return load_interpreter_module().app
+
+
+def rss_mb(pid: int | None = None) -> float:
+    """Current resident set size of this process, or of `pid` on Linux, in MiB"""
+    try:
+        with open(f"/proc/{pid or 'self'}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
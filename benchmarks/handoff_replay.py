@@ -0,0 +1,93 @@
+"""
+Latency and prompt tokens of the two graph modes on a replay set of data questions.
+
+"supervisor" routes supervisor → sql_agent → supervisor → analysis_agent →
+supervisor; "direct" hands the SQL agent's query straight to the analysis agent.
+Each question is run through the compiled graph against the stand-ins in
+`benchmarks/fakes.py`, which report input tokens as characters / 4 of every
+model call, so token figures compare the modes rather than predict billing.
+
+    python -m benchmarks.handoff_replay benchmarks/data/chat_replay.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+
+from benchmarks import fakes
+from benchmarks.chat_load import serve, shutdown
+
+
+async def replay(questions: list[str], mode: str) -> dict:
+    from langchain_core.messages import HumanMessage
+
+    from app.agent.agent_config import agent_config
+    from app.agent.graph import create_graph
+
+    agent_config.graph_mode = mode
+    latencies, calls, tokens = [], [], []
+    for question in questions:
+        graph = create_graph(
+            {
+                "application": {"name": "Intellisight", "description": "reports KPIs"},
+                "selected_hotels": fakes.HOTELS,
+            }
+        )
+        fakes.CALLS.clear()
+        start = time.perf_counter()
+        await graph.ainvoke(
+            {"messages": [HumanMessage(content=question)]},
+            config={
+                "configurable": {
+                    "thread_id": str(uuid.uuid4()),
+                    "database": fakes.DATABASE,
+                    "selected_hotels": fakes.HOTELS,
+                }
+            },
+        )
+        latencies.append(time.perf_counter() - start)
+        calls.append(len(fakes.CALLS))
+        tokens.append(sum(fakes.CALLS))
+    return {
+        "latency_s_mean": round(statistics.mean(latencies), 3),
+        "llm_calls_mean": statistics.mean(calls),
+        "input_tokens_mean": round(statistics.mean(tokens)),
+    }
+
+
+async def main(args: argparse.Namespace) -> dict:
+    fakes.install(args.interpreter_port, args.api_port, llm_latency=args.llm_latency)
+
+    from main import app as api_app
+
+    servers = [
+        await serve(fakes.load_interpreter_app(), args.interpreter_port),
+        await serve(api_app, args.api_port),
+    ]
+    with open(args.replay) as f:
+        questions = [json.loads(line)["question"] for line in f if line.strip()]
+
+    report = {"questions": len(questions), "llm_latency": args.llm_latency}
+    for mode in ("supervisor", "direct"):
+        report[mode] = await replay(questions, mode)
+    for key in ("latency_s_mean", "input_tokens_mean"):
+        before = report["supervisor"][key]
+        report[f"{key}_saved_pct"] = round(
+            100 * (before - report["direct"][key]) / before, 1
+        )
+
+    await shutdown(servers)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("replay", help="JSONL file of {\"question\": ...} lines")
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--api-port", type=int, default=8765)
+    parser.add_argument("--interpreter-port", type=int, default=8766)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args)), indent=2))
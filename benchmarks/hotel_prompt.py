@@ -0,0 +1,100 @@
+"""
+Prompt size of the selected-hotels context for large selections.
+
+Compares the previous encoding (the Python repr of the hotel list) with the
+compact one in app.agent.hotels, for the supervisor and SQL agent context
+messages that are resent on every LLM call. Tokens are counted with tiktoken
+(o200k_base, the gpt-4o encoding) when installed, otherwise estimated as
+characters / 4. With --live, each context is also sent once to the routing tier
+model to measure time to response (needs OPENAI_API_KEY).
+
+    python -m benchmarks.hotel_prompt --sizes 10 50 200 500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import date
+
+from benchmarks.fakes import ROOT
+
+try:
+    import tiktoken
+except ImportError:  # optional dependency
+    tiktoken = None
+
+
+def counter():
+    if tiktoken is None:
+        return lambda text: len(text) // 4
+    encoding = tiktoken.get_encoding("o200k_base")
+    return lambda text: len(encoding.encode(text))
+
+
+def contexts(hotels, encode) -> dict[str, str]:
+    from app.agent.agent_config import agent_config
+
+    today = date.today()
+    return {
+        "supervisor": agent_config.supervisor_context.format(
+            today=today,
+            hotels=encode(hotels),
+            url="http://interpreter",
+            application="Intellisight",
+            description="reports hotel KPIs",
+        ),
+        "sql_agent": agent_config.sql_agent_context.format(
+            today=today, hotels=encode(hotels)
+        ),
+    }
+
+
+async def time_call(text: str) -> float:
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    from app.agent.models import load_agent_model
+
+    model = load_agent_model("routing", "benchmark")
+    start = time.perf_counter()
+    await model.ainvoke(
+        [SystemMessage(content=text), HumanMessage(content="Reply with OK.")]
+    )
+    return time.perf_counter() - start
+
+
+def main(sizes: list[int], live: bool) -> dict:
+    os.chdir(ROOT)
+    from app.agent.hotels import encode_hotels
+
+    count = counter()
+    report = {}
+    for size in sizes:
+        hotels = [
+            {"id": 6000 + i, "name": f"Courtyard by Marriott Downtown Property {i}"}
+            for i in range(size)
+        ]
+        row = {}
+        for label, encode in (("repr", str), ("compact", encode_hotels)):
+            for agent, text in contexts(hotels, encode).items():
+                row[f"{agent}_{label}_tokens"] = count(text)
+                if live:
+                    row[f"{agent}_{label}_seconds"] = round(
+                        asyncio.run(time_call(text)), 3
+                    )
+        for agent in ("supervisor", "sql_agent"):
+            before = row[f"{agent}_repr_tokens"]
+            row[f"{agent}_saved_pct"] = round(
+                100 * (before - row[f"{agent}_compact_tokens"]) / before, 1
+            )
+        report[size] = row
+    return {"tokenizer": "o200k_base" if tiktoken else "chars/4", "sizes": report}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 200, 500])
+    parser.add_argument("--live", action="store_true", help="time real model calls")
+    args = parser.parse_args()
+    print(json.dumps(main(args.sizes, args.live), indent=2))
@@ -0,0 +1,45 @@
+"""
+Import-time budget check for the API.
+
+Imports `main` in a fresh interpreter and fails (exit code 1) when it takes longer
+than the budget, so heavy work creeping back into module import is caught in CI.
+
+    python -m benchmarks.import_time --budget 4.0
+"""
+
+import argparse
+import subprocess
+import sys
+
+from benchmarks.fakes import ROOT
+
+PROBE = (
+    "import time; start = time.perf_counter(); import main; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def measure(runs: int) -> list[float]:
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--budget", type=float, default=4.0, help="seconds")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    samples = measure(args.runs)
+    best = min(samples)
+    print(f"import main: best {best:.3f}s over {args.runs} runs (budget {args.budget}s)")
+    sys.exit(0 if best <= args.budget else 1)
@@ -0,0 +1,94 @@
+"""
+Memory and groupby speed of execute_sql DataFrames, raw vs. typed.
+
+Builds a synthetic Business-on-the-Books pull as the JSON records the SQL API
+returns, then compares `pd.DataFrame(records)` with `typed_frame` from
+interpreter/frames.py: deep memory usage, construction time, and a typical
+agent aggregation (room revenue and nights by hotel and month).
+
+    python -m benchmarks.interpreter_frames --rows 200000 500000
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SEGMENTS = ["TRANSIENT", "GROUP", "CONTRACT", "WHOLESALE", "OTA", "CORPORATE"]
+COLUMN_TYPES = {
+    "HOTEL_ID": "number",
+    "BUSINESS_DATE": "yyyymmdd",
+    "ROOMS": "number",
+    "ROOM_REVENUE": "number",
+    "PMS_MARKET_SEGMENT": "varchar",
+}
+
+
+def records(rows: int, hotels: int = 200) -> list[dict]:
+    rng = random.Random(7)
+    return [
+        {
+            "HOTEL_ID": 6000 + (i % hotels),
+            "HOTEL_NAME": f"Courtyard Downtown Property {i % hotels}",
+            "BUSINESS_DATE": 20250101 + 100 * rng.randrange(9) + rng.randrange(28),
+            "ROOMS": rng.randrange(1, 4),
+            "ROOM_REVENUE": round(rng.uniform(80, 450), 2),
+            "PMS_MARKET_SEGMENT": rng.choice(SEGMENTS),
+        }
+        for i in range(rows)
+    ]
+
+
+def measure(build, data: list[dict]) -> dict:
+    start = time.perf_counter()
+    df = build(data)
+    built = time.perf_counter() - start
+
+    month = (
+        df["BUSINESS_DATE"].dt.to_period("M")
+        if hasattr(df["BUSINESS_DATE"], "dt")
+        else df["BUSINESS_DATE"] // 100
+    )
+    timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        df.groupby(["HOTEL_NAME", month], observed=True)[
+            ["ROOM_REVENUE", "ROOMS"]
+        ].sum()
+        timings.append(time.perf_counter() - start)
+    return {
+        "memory_mb": round(df.memory_usage(deep=True).sum() / 2**20, 1),
+        "build_s": round(built, 3),
+        "groupby_s": round(min(timings), 4),
+        "dtypes": {column: str(dtype) for column, dtype in df.dtypes.items()},
+    }
+
+
+def main(sizes: list[int]) -> dict:
+    sys.path.insert(0, str(ROOT / "interpreter"))
+    import pandas as pd
+    from frames import typed_frame
+
+    report = {}
+    for rows in sizes:
+        data = records(rows)
+        raw = measure(pd.DataFrame, data)
+        typed = measure(lambda d: typed_frame(d, COLUMN_TYPES), data)
+        report[rows] = {
+            "raw": raw,
+            "typed": typed,
+            "memory_ratio": round(raw["memory_mb"] / typed["memory_mb"], 2),
+            "groupby_speedup": round(raw["groupby_s"] / typed["groupby_s"], 2),
+        }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 500_000])
+    args = parser.parse_args()
+    print(json.dumps(main(args.rows), indent=2))
@@ -0,0 +1,319 @@
+"""
+Concurrency benchmark for the code interpreter's /run endpoint.
+
+Serves interpreter/main.py in a child process, as in production, with
+`execute_sql` replaced by a stub that returns synthetic Business-on-the-Books
+DataFrames of a configurable size, then drives concurrent clients over HTTP (as
+many analysis agents would) for a fixed duration. Reports requests per second,
+p50/p95 latency, the time split across the exec, figures and objects phases
+(from the interpreter's own Prometheus histograms), and the interpreter's RSS and
+/tmp growth over the run. Each request prints its own nonce, and responses that
+miss it, carry another request's nonce or return the wrong number of figures are
+counted as isolation failures (output or plots leaking between concurrent runs).
+The full report, including the samples, is written as JSON so results can be
+compared between versions.
+
+    python -m benchmarks.interpreter_load --clients 20 --duration 300 --rows 50000 \\
+        --output interpreter-bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks import fakes
+from benchmarks.chat_load import percentiles
+
+NONCE = "request nonce: "
+
+CODE = '''df = execute_sql("SELECT * FROM DM_BI.VW_ISP_PMS_BOB")
+summary = df.groupby(["HOTEL_ID", "PMS_MARKET_SEGMENT"], observed=True)[
+    ["ROOM_REVENUE", "ROOMS"]
+].sum().reset_index()
+summary["ADR"] = summary["ROOM_REVENUE"] / summary["ROOMS"]
+print(summary.sort_values("ADR", ascending=False).head())
+'''
+
+PLOT = '''fig, ax = plt.subplots(figsize=(8, 4))
+summary.groupby("HOTEL_ID")["ADR"].mean().plot.bar(ax=ax)
+ax.set_title("ADR by hotel")
+'''
+
+
+def stub_execute_sql(rows: int):
+    """Returns an execute_sql replacement producing a synthetic BOB pull"""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(7)
+    frame = pd.DataFrame(
+        {
+            "HOTEL_ID": 6000 + rng.integers(0, 50, rows),
+            "BUSINESS_DATE": 20250801 + rng.integers(0, 28, rows),
+            "ROOMS": rng.integers(1, 4, rows),
+            "ROOM_REVENUE": rng.uniform(80, 450, rows).round(2),
+            "PMS_MARKET_SEGMENT": rng.choice(
+                ["TRANSIENT", "GROUP", "CONTRACT", "OTA"], rows
+            ),
+        }
+    )
+
+    def execute_sql(sql: str, database: str, timeout: int = 60, **kwargs):
+        return frame.copy()
+
+    return execute_sql
+
+
+def tmp_usage(directory: str) -> tuple[int, float]:
+    """Files and MiB the interpreter has written to its temp dir"""
+    files, size = 0, 0
+    for entry in os.scandir(directory):
+        if entry.is_file() and entry.name.endswith((".png", ".csv")):
+            files += 1
+            size += entry.stat().st_size
+    return files, round(size / 2**20, 1)
+
+
+def phase_totals(metrics_text: str) -> dict[str, dict[str, float]]:
+    """Sum and count of interpreter_phase_seconds per phase from /metrics"""
+    from prometheus_client.parser import text_string_to_metric_families
+
+    totals: dict[str, dict[str, float]] = {}
+    for family in text_string_to_metric_families(metrics_text):
+        if family.name != "interpreter_phase_seconds":
+            continue
+        for sample in family.samples:
+            field = sample.name.rsplit("_", 1)[-1]
+            if field in ("sum", "count"):
+                totals.setdefault(sample.labels["phase"], {})[field] = sample.value
+    return totals
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=fakes.ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def check_isolation(body: dict, nonce: str, plot: bool, leaks: dict) -> None:
+    """Counts a response whose output or figures are not (only) its own request's"""
+    output = body.get("output") or ""
+    if f"{NONCE}{nonce}" not in output:
+        leaks["missing_output"] += 1
+    if output.count(NONCE) > (f"{NONCE}{nonce}" in output):
+        leaks["foreign_output"] += 1
+    if len(body.get("images") or []) != int(plot):
+        leaks["wrong_images"] += 1
+
+
+async def client_loop(
+    client: httpx.AsyncClient,
+    code: str,
+    plot: bool,
+    deadline: float,
+    results: list,
+    errors: list,
+    leaks: dict,
+):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        nonce = uuid.uuid4().hex[:12]
+        try:
+            response = await client.post(
+                "/run",
+                json={
+                    "code": f'print("{NONCE}{nonce}")\n{code}',
+                    "database": fakes.DATABASE,
+                },
+            )
+            response.raise_for_status()
+            body = response.json()
+            if body["status"] != "success":
+                raise RuntimeError(body["errors"][:200])
+            results.append(time.perf_counter() - start)
+            check_isolation(body, nonce, plot, leaks)
+        except Exception as e:
+            errors.append(str(e))
+
+
+async def sample_usage(
+    samples: list,
+    pid: int,
+    temp_dir: str,
+    start: float,
+    stop: asyncio.Event,
+    every: float,
+):
+    while not stop.is_set():
+        files, tmp_mb = tmp_usage(temp_dir)
+        samples.append(
+            {
+                "t": round(time.perf_counter() - start, 1),
+                "rss_mb": round(fakes.rss_mb(pid), 1),
+                "tmp_files": files,
+                "tmp_mb": tmp_mb,
+            }
+        )
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=every)
+        except asyncio.TimeoutError:
+            pass
+
+
+def serve_interpreter(rows: int, port: int) -> None:
+    """Child process entry point: the interpreter app with the stubbed execute_sql"""
+    import uvicorn
+
+    module = fakes.load_interpreter_module()
+    module.execute_sql = stub_execute_sql(rows)
+    uvicorn.run(module.app, host="127.0.0.1", port=port, log_level="warning")
+
+
+async def wait_until_up(
+    client: httpx.AsyncClient, process: subprocess.Popen, timeout: float = 60
+) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Interpreter exited with code {process.returncode}")
+        try:
+            if (await client.get("/metrics")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Interpreter did not start in time")
+
+
+async def main(args: argparse.Namespace) -> dict:
+    sys.path.insert(0, str(fakes.ROOT / "interpreter"))
+    from config import TEMP_IMAGE_DIR
+
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.interpreter_load",
+            "--serve",
+            "--rows",
+            str(args.rows),
+            "--port",
+            str(args.port),
+        ],
+        cwd=fakes.ROOT,
+    )
+    try:
+        return await drive(args, process, TEMP_IMAGE_DIR)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+async def drive(
+    args: argparse.Namespace, process: subprocess.Popen, temp_dir: str
+) -> dict:
+    base_url = f"http://127.0.0.1:{args.port}"
+    code = CODE + (PLOT if args.plot else "")
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        await wait_until_up(client, process)
+        before = phase_totals((await client.get("/metrics")).text)
+        results: list[float] = []
+        errors: list[str] = []
+        leaks = {"missing_output": 0, "foreign_output": 0, "wrong_images": 0}
+        samples: list[dict] = []
+        stop = asyncio.Event()
+        start = time.perf_counter()
+        sampler = asyncio.create_task(
+            sample_usage(
+                samples, process.pid, temp_dir, start, stop, args.sample_every
+            )
+        )
+        await asyncio.gather(
+            *(
+                client_loop(
+                    client,
+                    code,
+                    args.plot,
+                    start + args.duration,
+                    results,
+                    errors,
+                    leaks,
+                )
+                for _ in range(args.clients)
+            )
+        )
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await sampler
+        after = phase_totals((await client.get("/metrics")).text)
+
+    phases = {}
+    for phase, totals in after.items():
+        count = totals.get("count", 0) - before.get(phase, {}).get("count", 0)
+        seconds = totals.get("sum", 0) - before.get(phase, {}).get("sum", 0)
+        if count:
+            phases[phase] = {
+                "total_s": round(seconds, 2),
+                "mean_ms": round(1000 * seconds / count, 1),
+            }
+
+    return {
+        "version": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "clients": args.clients,
+        "duration_s": round(elapsed, 1),
+        "rows": args.rows,
+        "plot": args.plot,
+        "requests": len(results),
+        "errors": len(errors),
+        "requests_per_s": round(len(results) / elapsed, 2),
+        "latency_s": percentiles(results),
+        "isolation_failures": leaks,
+        "phases": phases,
+        "growth": {
+            "rss_mb": samples[-1]["rss_mb"] - samples[0]["rss_mb"],
+            "tmp_files": samples[-1]["tmp_files"] - samples[0]["tmp_files"],
+            "tmp_mb": round(samples[-1]["tmp_mb"] - samples[0]["tmp_mb"], 1),
+        },
+        "samples": samples,
+        "error_samples": errors[:5],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=60, help="seconds")
+    parser.add_argument("--rows", type=int, default=10_000, help="rows per execute_sql")
+    parser.add_argument("--no-plot", dest="plot", action="store_false")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--sample-every", type=float, default=5, help="seconds")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve_interpreter(args.rows, args.port)
+        sys.exit()
+
+    report = asyncio.run(main(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps({k: v for k, v in report.items() if k != "samples"}, indent=2))
@@ -0,0 +1,57 @@
+"""
+Replays recorded agent SQL through the local validator.
+
+Each line of the replay file is {"sql": ..., "warehouse_error": bool}, where
+`warehouse_error` records whether Snowflake rejected the query for a bad name.
+Rejected queries are warehouse round trips the validator avoids.
+
+    python -m benchmarks.sql_validation benchmarks/data/sql_replay.jsonl
+"""
+
+import argparse
+import json
+import time
+
+from benchmarks.fakes import ROOT
+
+
+def main(path: str) -> dict:
+    import os
+
+    os.chdir(ROOT)
+    from app.database.sql_validator import load_schema_models, validate_sql
+
+    load_schema_models()
+    with open(path) as f:
+        cases = [json.loads(line) for line in f if line.strip()]
+
+    rejected = false_rejections = missed = skipped = 0
+    timings = []
+    for case in cases:
+        start = time.perf_counter()
+        errors = validate_sql(case["sql"])
+        timings.append(time.perf_counter() - start)
+        if errors is None:
+            skipped += 1
+            continue
+        if errors:
+            rejected += 1
+            false_rejections += not case.get("warehouse_error", True)
+        elif case.get("warehouse_error"):
+            missed += 1
+
+    return {
+        "queries": len(cases),
+        "round_trips_avoided": rejected - false_rejections,
+        "false_rejections": false_rejections,
+        "missed_errors": missed,
+        "unchecked": skipped,
+        "mean_validation_us": round(1e6 * sum(timings) / max(len(timings), 1), 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("replay", help="JSONL replay set")
+    args = parser.parse_args()
+    print(json.dumps(main(args.replay), indent=2))
@@ -6,6 +6,11 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 TEMP_IMAGE_DIR = "/tmp"
+SQL_API_URL = os.getenv("SQL_API_URL", "http://host.docker.internal:8000")
+# execute_sql types its DataFrames (dates, categoricals, int32 integers) unless off
+TYPED_FRAMES = os.getenv("TYPED_FRAMES", "true").lower() != "false"
+# string columns with at most this share of distinct values become categoricals
+CATEGORY_MAX_RATIO = float(os.getenv("CATEGORY_MAX_RATIO", "0.05"))
 os.makedirs(TEMP_IMAGE_DIR, exist_ok=True)
 
 
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from config import CATEGORY_MAX_RATIO
+
+# YYYYMMDD integers outside this range are not treated as dates
+MIN_DATE, MAX_DATE = 19000101, 21001231
+# narrowest integer type: int8/int16 wrap around silently in arithmetic (ROOMS * 100)
+INT32 = np.iinfo(np.int32)
+
+
+def _as_date(series: pd.Series) -> pd.Series | None:
+    """Parses YYYYMMDD integers (the warehouse's *_DATE number columns)"""
+    values = pd.to_numeric(series, errors="coerce")
+    present = values.dropna()
+    if present.empty or len(present) != series.notna().sum():
+        return None
+    if (present % 1 != 0).any() or present.min() < MIN_DATE or present.max() > MAX_DATE:
+        return None
+    return pd.to_datetime(
+        values.astype("Int64").astype("string"), format="%Y%m%d", errors="coerce"
+    )
+
+
+def _as_number(series: pd.Series) -> pd.Series:
+    """Stores integers as int32 when they fit, else int64; floats stay float64 so
+    revenue sums keep their precision"""
+    values = pd.to_numeric(series, errors="coerce")
+    if values.isna().sum() > series.isna().sum():
+        return series  # not all numeric; leave as returned
+    present = values.dropna()
+    if len(present) == len(values) and (present % 1 == 0).all():
+        fits = INT32.min <= present.min() and present.max() <= INT32.max
+        return values.astype("int32" if fits else "int64")
+    return values
+
+
+def _as_category(series: pd.Series) -> pd.Series:
+    present = series.dropna()
+    if len(present) < 2 or not all(isinstance(value, str) for value in present):
+        return series
+    if present.nunique() > CATEGORY_MAX_RATIO * len(series):
+        return series
+    return series.astype("category")
+
+
+def typed_frame(
+    records: list[dict], column_types: dict[str, str] | None = None
+) -> pd.DataFrame:
+    """Builds a DataFrame from JSON records with compact, meaningful dtypes.
+
+    `column_types` maps column names to the types declared in the schema models
+    ("number", "varchar", "yyyymmdd"); columns without one are typed from their
+    values. YYYYMMDD columns (and number columns named *_DATE holding such values)
+    become datetimes, low-cardinality strings become categoricals and integers
+    are stored as int32 when they fit.
+    """
+    df = pd.DataFrame.from_records(records)
+    declared = {
+        name.upper(): kind.lower() for name, kind in (column_types or {}).items()
+    }
+
+    for column in df.columns:
+        series = df[column]
+        kind = declared.get(str(column).upper())
+        numeric = pd.api.types.is_numeric_dtype(
+            series
+        ) and not pd.api.types.is_bool_dtype(series)
+        try:
+            if kind in ("date", "timestamp", "datetime"):
+                df[column] = pd.to_datetime(series, errors="coerce")
+                continue
+            if kind == "yyyymmdd" or (
+                kind in (None, "number") and str(column).upper().endswith("DATE")
+            ):
+                date = _as_date(series)
+                if date is not None:
+                    df[column] = date
+                    continue
+            if kind == "number" or (kind is None and numeric):
+                df[column] = _as_number(series)
+            elif series.dtype == object:
+                df[column] = _as_category(series)
+        except (TypeError, ValueError):
+            continue  # leave the column as returned
+    return df
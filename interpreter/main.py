@@ -3,15 +3,17 @@ from contextlib import asynccontextmanager
 import os
 
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 import matplotlib.pyplot as plt
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 
 from schema import CodeRequest, CodeToolResult
 from utils import execute_code_async, execute_sql
 from config import logger, TEMP_IMAGE_DIR
+from metrics import inflight_runs
 
 
 @asynccontextmanager
@@ -44,6 +46,12 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics endpoint"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.post("/run", response_model=CodeToolResult)
 async def run_code(request: CodeRequest):
     """Execute Python code and return results with image URLs and objects"""
@@ -53,9 +61,10 @@ async def run_code(request: CodeRequest):
         logger.info(f"Executing code: {request.code}")
         bound_execute_sql = functools.partial(execute_sql, database=request.database)
 
-        result = await execute_code_async(
-            request.code, bound_execute_sql=bound_execute_sql
-        )
+        with inflight_runs.track_inprogress():
+            result = await execute_code_async(
+                request.code, bound_execute_sql=bound_execute_sql
+            )
         logger.info(f"Result: {result}")
         return CodeToolResult(**result)
     except HTTPException:
@@ -0,0 +1,15 @@
+from prometheus_client import Gauge, Histogram
+
+
+phase_seconds = Histogram(
+    "interpreter_phase_seconds",
+    "Time spent in each phase of a /run request",
+    ["phase"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 60),
+)
+sql_seconds = Histogram(
+    "interpreter_execute_sql_seconds",
+    "Latency of execute_sql calls made from user code",
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 60),
+)
+inflight_runs = Gauge("interpreter_inflight_runs", "Code executions in progress")
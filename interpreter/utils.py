@@ -34,27 +34,43 @@ import pandas as pd
 from fastapi import HTTPException
 
 import matplotlib.pyplot as plt
-from config import logger, TEMP_IMAGE_DIR
+from config import logger, SQL_API_URL, TEMP_IMAGE_DIR, TYPED_FRAMES
+from frames import typed_frame
+from metrics import phase_seconds, sql_seconds
 
 
 class ExecuteSQLCallable(Protocol):
-    def __call__(self, sql: str, timeout: int = ...) -> pd.DataFrame: ...
+    def __call__(
+        self, sql: str, timeout: int = ..., typed: bool = ...
+    ) -> pd.DataFrame: ...
 
 
-def execute_sql(sql: str, database: str, timeout: int = 60) -> pd.DataFrame:
-    """Execute SQL query via external API"""
+def execute_sql(
+    sql: str, database: str, timeout: int = 60, typed: bool = TYPED_FRAMES
+) -> pd.DataFrame:
+    """Execute SQL query via external API.
+
+    With `typed`, column types come from the API's X-Column-Types header (schema
+    model types) or the values: YYYYMMDD dates are parsed, low-cardinality strings
+    become categoricals and integers are stored as int32 when they fit.
+    """
     try:
-        response = requests.post(
-            "http://host.docker.internal:8000/api/db/query",
-            json={"sql": sql, "database": database},
-            timeout=timeout,
-        )
+        with sql_seconds.time():
+            response = requests.post(
+                f"{SQL_API_URL}/api/db/query",
+                json={"sql": sql, "database": database},
+                timeout=timeout,
+            )
         response.raise_for_status()
         data = response.json()
         if isinstance(data, list) and len(data) == 0:
             logger.warning("SQL query returned empty result set")
             return pd.DataFrame()
-        df = pd.DataFrame(data)
+        if typed:
+            column_types = json.loads(response.headers.get("X-Column-Types", "{}"))
+            df = typed_frame(data, column_types)
+        else:
+            df = pd.DataFrame(data)
         logger.info(f"SQL query returned {len(df)} rows")
         return df
     except requests.exceptions.HTTPError as http_error:
@@ -275,14 +291,17 @@ async def execute_code_async(code: str, bound_execute_sql: ExecuteSQLCallable) -
             contextlib.redirect_stderr(stderr_buffer),
         ):
             loop = asyncio.get_event_loop()
-            await asyncio.wait_for(
-                loop.run_in_executor(None, lambda: exec(code, exec_env, exec_env)),
-                timeout=timeout,
-            )
+            with phase_seconds.labels("exec").time():
+                await asyncio.wait_for(
+                    loop.run_in_executor(None, lambda: exec(code, exec_env, exec_env)),
+                    timeout=timeout,
+                )
         result["output"] = stdout_buffer.getvalue()
         result["errors"] = stderr_buffer.getvalue()
-        result["images"] = capture_matplotlib_figures()
-        objs, files = capture_objects(exec_env)
+        with phase_seconds.labels("figures").time():
+            result["images"] = capture_matplotlib_figures()
+        with phase_seconds.labels("objects").time():
+            objs, files = capture_objects(exec_env)
         result["objects"] = objs
         result["files"] = files
         result["status"] = "success"
@@ -1,8 +1,17 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 from contextlib import asynccontextmanager
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
+from app.agent.runs import runs
+from app.agent.stream import graph_events
+from app.agent.tools import get_web_search
+from app.database.replica import replica
+from app.database.snowflake import health_check_loop, warm_up_engine
 from app.database.vector_database.vector_db import get_or_create_vector_store
+from app.readiness import readiness
 from app.routers.api import api_router
 
 from app.config import settings
@@ -11,10 +20,26 @@ from app.config import settings
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print(f"\n🚀 Starting {settings.app_name} v{settings.app_version}")
-    get_or_create_vector_store()
+    warm_up = readiness.warm_up(
+        {
+            "snowflake": warm_up_engine,
+            "vector_store": get_or_create_vector_store,
+            "web_search": get_web_search,
+        }
+    )
+    replica_task = (
+        asyncio.create_task(replica.refresh_loop()) if replica.enabled else None
+    )
+    health_task = asyncio.create_task(health_check_loop())
+    runs.start_workers(graph_events, settings.run_workers)
     print("✅ Application startup complete\n")
 
     yield
+    await runs.stop_workers()
+    warm_up.cancel()
+    health_task.cancel()
+    if replica_task is not None:
+        replica_task.cancel()
     print("\n🛑 Application shutdown complete")
 
 
@@ -29,3 +54,16 @@ app.add_middleware(
 )
 
 app.include_router(api_router)
+
+
+@app.get("/ready", include_in_schema=False)
+async def ready():
+    return JSONResponse(
+        {"ready": readiness.ready, "components": readiness.components},
+        status_code=200 if readiness.ready else 503,
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)